@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+
+"""
+Load and soak test for the web API.
+
+Generates a target directory (plus a tree of subdirectories for the folder browser) in a
+temp folder, serves webapp.app from a separate process on a free local port, exactly as
+`main()` does (threaded, no reloader), and drives it with many concurrent clients issuing
+a mix of preview, apply, undo and listing requests. Everything runs on 127.0.0.1.
+
+Reports:
+- throughput, error counts and latency percentiles per endpoint
+- latency of requests started while a write (/api/apply or /api/undo) is in flight vs.
+  while none is: for writes this is the wait on webapp.rename_lock, which serializes them,
+  for previews the cost of sharing the server with a running rename
+- server RSS and throughput sampled over time, to spot memory growth in long runs
+- whether any file was lost along the way (applies and undos race each other on purpose)
+
+Applies toggle a token in every name (file_A_... <-> file_B_...), so names never grow
+however long the run.
+
+Usage:
+    python -m benchmarks.bench_load [--clients 16] [--duration 30] [--files 2000] [--json results.json]
+    python -m benchmarks.bench_load --clients 32 --duration 1800 --interval 30   # soak
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative weights of each kind of client request
+TRAFFIC_MIX = {
+    "preview": 50,
+    "preview_filtered": 15,
+    "apply": 8,
+    "undo": 7,
+    "list_files": 10,
+    "list_dir": 10,
+}
+
+
+def make_tree(root: str, files: int, dirs: int) -> str:
+    """
+    Create the target directory with `files` files and `dirs` subdirectories (two levels
+    deep, for /api/list_dir). Returns the target directory.
+    """
+    target = os.path.join(root, "target")
+    os.mkdir(target)
+    for i in range(files):
+        ext = ("jpg", "png", "txt")[i % 3]
+        with open(os.path.join(target, f"file_A_{i:06d}.{ext}"), "wb") as f:
+            f.write(b"x" * (i % 5) * 200)
+    browse = os.path.join(root, "browse")
+    for i in range(dirs):
+        for j in range(4):
+            os.makedirs(os.path.join(browse, f"dir_{i:04d}", f"sub_{j}"))
+    return target
+
+
+def serve(target: str) -> None:
+    """
+    Server process entry point: serve the app for `target` on a free port and print it.
+    """
+    import logging
+    from werkzeug.serving import make_server
+    from filerenamer.core import FileRenamerSingleton
+    from filerenamer.webapp import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    FileRenamerSingleton.initialize(target)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+
+def rss_kib(pid: int):
+    """
+    Resident set size of `pid` in KiB, or None if it can't be read.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:  # macOS and other systems without /proc
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True)
+        return int(out.stdout.strip())
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(ordered: list, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(latencies: list, statuses: list, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "errors": sum(1 for status in statuses if status == 0 or status >= 500),
+        "rejected": sum(1 for status in statuses if 400 <= status < 500),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+class LoadTest:
+    """
+    Shared state for the client threads: the request log and the applies in flight.
+    """
+
+    def __init__(self, base_url: str, browse_root: str, dirs: int, seed: int):
+        self.base_url = base_url
+        self.browse_root = browse_root
+        self.dirs = dirs
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.records = []  # (finished_at, kind, latency_s, status)
+        self.writes_in_flight = 0  # applies and undos sent but not yet answered
+        self.stop = threading.Event()
+
+    def call(self, method: str, path: str, payload=None):
+        """
+        Issue one request and return (status, parsed JSON body or None).
+        Status 0 means the request never got a response.
+        """
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        req = Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urlopen(req, timeout=120) as res:
+                return res.status, json.loads(res.read())
+        except HTTPError as e:
+            body = e.read()
+            try:
+                return e.code, json.loads(body)
+            except ValueError:
+                return e.code, None
+        except (URLError, OSError):
+            return 0, None
+
+    def record(self, kind: str, start: float, status: int) -> None:
+        now = time.perf_counter()
+        with self.lock:
+            self.records.append((now, kind, now - start, status))
+
+    def preview_payload(self, rng: random.Random, filtered: bool) -> dict:
+        action = rng.choice(("replace", "prefix", "enum"))
+        if action == "replace":
+            payload = {"action": "replace", "change_this": "_A_", "to_this": "_B_"}
+        elif action == "prefix":
+            payload = {"action": "prefix", "prefix": "PRE_"}
+        else:
+            payload = {"action": "enum", "start": 1, "loc": "end", "sep": "_"}
+        if filtered:
+            payload["filter"] = rng.choice(({"ext": "jpg"}, {"glob": "file_*1.*"}, {"min_size": 400}))
+        return payload
+
+    def preview(self, rng: random.Random, filtered: bool) -> None:
+        with self.lock:
+            contended = self.writes_in_flight > 0
+        kind = "preview_filtered" if filtered else "preview"
+        start = time.perf_counter()
+        status, _ = self.call("POST", "/api/preview", self.preview_payload(rng, filtered))
+        self.record(kind + (" (during write)" if contended else ""), start, status)
+
+    def write(self, kind: str, path: str, payload=None) -> None:
+        """
+        Send a request that takes webapp.rename_lock, noting whether another one was in flight.
+        """
+        with self.lock:
+            contended = self.writes_in_flight > 0
+            self.writes_in_flight += 1
+        start = time.perf_counter()
+        try:
+            status, _ = self.call("POST", path, payload)
+        finally:
+            with self.lock:
+                self.writes_in_flight -= 1
+        self.record(kind + (" (during write)" if contended else ""), start, status)
+
+    def apply(self) -> None:
+        # Plan the toggle with a preview, as the UI does, then apply whatever it returned
+        status, body = self.call("POST", "/api/preview", {"action": "replace", "change_this": "_A_", "to_this": "_B_"})
+        if status == 200 and body and not body["mapping"]:
+            status, body = self.call("POST", "/api/preview", {"action": "replace", "change_this": "_B_", "to_this": "_A_"})
+        if status != 200 or not body:
+            return
+        self.write("apply", "/api/apply", {"mapping": body["mapping"]})
+
+    def undo(self) -> None:
+        self.write("undo", "/api/undo")
+
+    def list_files(self) -> None:
+        start = time.perf_counter()
+        status, _ = self.call("GET", "/api/list_files")
+        self.record("list_files", start, status)
+
+    def list_dir(self, rng: random.Random) -> None:
+        path = os.path.join(self.browse_root, f"dir_{rng.randrange(self.dirs):04d}")
+        query = urlencode({"path": rng.choice((self.browse_root, path)), "limit": 100})
+        start = time.perf_counter()
+        status, _ = self.call("GET", "/api/list_dir?" + query)
+        self.record("list_dir", start, status)
+
+    def client(self, index: int) -> None:
+        rng = random.Random(self.seed + index)
+        kinds = list(TRAFFIC_MIX)
+        weights = list(TRAFFIC_MIX.values())
+        while not self.stop.is_set():
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "preview":
+                self.preview(rng, filtered=False)
+            elif kind == "preview_filtered":
+                self.preview(rng, filtered=True)
+            elif kind == "apply":
+                self.apply()
+            elif kind == "undo":
+                self.undo()
+            elif kind == "list_files":
+                self.list_files()
+            else:
+                self.list_dir(rng)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the web API with concurrent mixed traffic.")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client threads.")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic (use minutes to hours to soak).")
+    parser.add_argument("--interval", type=float, default=5, help="Seconds between RSS/throughput samples.")
+    parser.add_argument("--files", type=int, default=2000, help="Files in the target directory.")
+    parser.add_argument("--dirs", type=int, default=200, help="Subdirectories for the folder browser.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the traffic mix.")
+    parser.add_argument("--json", help="Also write results to this file for tracking over time.")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)  # server process entry point
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    root = tempfile.mkdtemp(prefix="filerenamer-bench-load-")
+    server = None
+    try:
+        target = make_tree(root, args.files, args.dirs)
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_load", "--serve", target],
+            env=env, cwd=REPO_ROOT, stdout=subprocess.PIPE, text=True
+        )
+        port = int(server.stdout.readline())
+        test = LoadTest(f"http://127.0.0.1:{port}", os.path.join(root, "browse"), args.dirs, args.seed)
+
+        print(f"{args.clients} clients for {args.duration}s against {args.files} files, server pid {server.pid}")
+        samples = [{"t_s": 0.0, "requests": 0, "rps": 0.0, "rss_kib": rss_kib(server.pid)}]
+        threads = [threading.Thread(target=test.client, args=(i,), daemon=True) for i in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        print(f"  {'t':>7} {'requests':>9} {'rps':>8} {'rss MiB':>8}")
+        while True:
+            remaining = args.duration - (time.perf_counter() - start)
+            if remaining <= 0:
+                break
+            time.sleep(min(args.interval, remaining))
+            with test.lock:
+                done = len(test.records)
+            t = time.perf_counter() - start
+            rss = rss_kib(server.pid)
+            rps = (done - samples[-1]["requests"]) / (t - samples[-1]["t_s"])
+            samples.append({"t_s": round(t, 2), "requests": done, "rps": round(rps, 2), "rss_kib": rss})
+            print(f"  {t:6.1f}s {done:>9} {rps:>8.1f} {(rss or 0) / 1024:>8.1f}")
+
+        test.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        files_after = len(os.listdir(target))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(root, ignore_errors=True)
+
+    by_kind = {}
+    for _, kind, latency, status in test.records:
+        entry = by_kind.setdefault(kind, ([], []))
+        entry[0].append(latency)
+        entry[1].append(status)
+    endpoints = {kind: summarize(latencies, statuses, elapsed) for kind, (latencies, statuses) in sorted(by_kind.items())}
+    total = summarize([r[2] for r in test.records], [r[3] for r in test.records], elapsed)
+    rss_values = [s["rss_kib"] for s in samples if s["rss_kib"] is not None]
+    results = {
+        "config": {
+            "clients": args.clients, "duration_s": args.duration, "files": args.files,
+            "dirs": args.dirs, "seed": args.seed, "mix": TRAFFIC_MIX,
+        },
+        "total": total,
+        "endpoints": endpoints,
+        "rss_kib": {
+            "start": rss_values[0] if rss_values else None,
+            "peak": max(rss_values, default=None),
+            "end": rss_values[-1] if rss_values else None,
+        },
+        "samples": samples,
+        "files_before": args.files,
+        "files_after": files_after,
+    }
+
+    print(f"  {'endpoint':<30} {'reqs':>7} {'rps':>8} {'err':>5} {'4xx':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for kind, r in list(endpoints.items()) + [("all", total)]:
+        print(
+            f"  {kind:<30} {r['requests']:>7} {r['rps']:>8.1f} {r['errors']:>5} {r['rejected']:>5} "
+            f"{r['p50_ms']:>8} {r['p90_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}"
+        )
+    rss = results["rss_kib"]
+    if rss["start"] is not None:
+        print(f"server RSS start={rss['start'] / 1024:.1f} MiB peak={rss['peak'] / 1024:.1f} MiB end={rss['end'] / 1024:.1f} MiB")
+    print(f"files before={results['files_before']} after={files_after}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    if total["errors"]:
+        failures.append(f"{total['errors']} request(s) failed or returned 5xx")
+    if files_after != args.files:
+        failures.append(f"file count changed from {args.files} to {files_after}")
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
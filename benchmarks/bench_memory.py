@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Memory benchmark for listings and mappings.
+
+Compares plain lists/dicts against StringTable/CompactMapping for a synthetic listing,
+measuring retained memory with tracemalloc, plus the peak while serializing to JSON.
+
+The compact types trade CPU for memory: every access slices a new str out of the packed
+table and new names are computed on demand, so iterating, validating (see bench_validate)
+and serializing them takes longer than with a dict that already holds every str.
+
+Usage:
+    python -m benchmarks.bench_memory [--entries 1000000]
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from filerenamer.core import build_prefix_mapping, build_enum_mapping
+from filerenamer.mapping import StringTable, compact, iter_json
+
+
+def measure(label: str, build):
+    """
+    Run `build()`, print the memory it retains and its peak, and return the result.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<36} retained={retained / 2**20:8.1f} MiB  peak={peak / 2**20:8.1f} MiB  {elapsed:6.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory use of dict and compact mappings.")
+    parser.add_argument("--entries", type=int, default=1_000_000, help="Number of files in the listing.")
+    args = parser.parse_args()
+
+    print(f"{args.entries} names")
+    names = [f"IMG_{i:07d}_holiday_photo.jpg" for i in range(args.entries)]
+
+    print("listing")
+    measure("list of str", lambda: [(name + ".")[:-1] for name in names])
+    table = measure("StringTable", lambda: StringTable(names))
+
+    print("prefix mapping")
+    plain = measure("dict", lambda: {name: "PRE_" + name for name in names})
+    measure("CompactMapping (shared listing)", lambda: build_prefix_mapping("", "PRE_", table))
+
+    print("enum mapping")
+    measure("dict", lambda: {name: f"{name[:-4]}_{i + 1}.jpg" for i, name in enumerate(names)})
+    measure("CompactMapping (shared listing)", lambda: build_enum_mapping("", 1, "end", "_", table))
+
+    print("arbitrary mapping kept in undo history (e.g. posted to /api/apply)")
+    posted = json.dumps(plain)
+    measure("dict parsed from JSON", lambda: json.loads(posted))
+    history = measure("CompactMapping.from_pairs (deltas)", lambda: compact(plain))
+
+    print("JSON serialization (streamed chunks are consumed, not kept)")
+    measure("json.dumps(dict)", lambda: len(json.dumps(plain)))
+    measure("iter_json(CompactMapping)", lambda: sum(len(chunk) for chunk in iter_json(history)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for CLI process startup.
+
+Times repeated `python -m filerenamer.cli ... --dry-run` invocations against a small
+generated directory, with and without the daemon, and breaks down the in-process import
+cost using `-X importtime`. Fails if modules that don't belong on the CLI path (Flask,
+webbrowser, tkinter) get imported.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 20] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be imported by the CLI
+FORBIDDEN_MODULES = ("flask", "werkzeug", "jinja2", "webbrowser", "tkinter")
+
+
+def time_runs(cmd: list, env: dict, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_times(cmd: list, env: dict):
+    """
+    Parse -X importtime output into ({ top_level_module: cumulative_microseconds },
+    [every module imported, nested ones included]).
+    """
+    result = subprocess.run(
+        [cmd[0], "-X", "importtime"] + cmd[1:],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    top_level = {}
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append(name.strip())
+        if not name.startswith("  "):  # nested imports are indented
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def summarize(timings: list) -> dict:
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "median_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time CLI startup in-process and via the daemon.")
+    parser.add_argument("--runs", type=int, default=20, help="Invocations per mode.")
+    parser.add_argument("--json", help="Also write results to this file for tracking over time.")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    env.pop("FILERENAMER_SOCKET", None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, "files")
+        os.mkdir(target)
+        for i in range(100):
+            open(os.path.join(target, f"IMG_{i:04d}.jpg"), "w").close()
+        cmd = [sys.executable, "-m", "filerenamer.cli", "--target", target, "--prefix", "PRE_", "--dry-run"]
+
+        imports, modules = import_times(cmd, env)
+        # Nested imports count too: flask pulled in through filerenamer.* is indented
+        forbidden = sorted({name for name in modules if name.split(".")[0] in FORBIDDEN_MODULES})
+        results = {"in_process": summarize(time_runs(cmd, env, args.runs))}
+
+        socket_path = os.path.join(tmp, "daemon.sock")
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "filerenamer.daemon", "--socket", socket_path],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            deadline = time.monotonic() + 10
+            while not os.path.exists(socket_path) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            daemon_env = dict(env, FILERENAMER_SOCKET=socket_path)
+            results["daemon"] = summarize(time_runs(cmd, daemon_env, args.runs))
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    results["imports_us"] = dict(sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:10])
+    results["forbidden_imports"] = forbidden
+
+    for mode in ("in_process", "daemon"):
+        r = results[mode]
+        print(f"{mode:<11} runs={r['runs']} min={r['min_ms']}ms median={r['median_ms']}ms max={r['max_ms']}ms")
+    print("slowest top-level imports (cumulative us):")
+    for name, us in results["imports_us"].items():
+        print(f"  {us:>8}  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if forbidden:
+        print(f"FAIL: CLI imported {', '.join(forbidden)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+"""
+Batch runner for renaming many independent directories in one go.
+
+Reads a JSON manifest of target directories and operations, runs each directory's full
+build/validate/apply pipeline on its own FileRenamer in a worker process, and prints a
+consolidated JSON report. A failure in one directory never affects the others, and the
+number of directories processed at once on the same filesystem (mount point) is capped so a
+slow mount can't take every worker.
+
+Manifest format:
+    {
+      "operations": [{"action": "prefix", "prefix": "PRE_"}],   # default for every job
+      "filter": {"ext": "jpg"},                                  # optional, default for every job
+      "jobs": [
+        "/data/a",                                               # uses default operations
+        {"target": "/data/b", "operations": [{"action": "enum", "start": 1}], "dry_run": true}
+      ]
+    }
+A bare list is accepted as the "jobs" list. Operation dicts use the same keys as
+/api/preview (see filerenamer.core.build_mapping), filters are described in
+filerenamer.filters.
+
+Usage:
+    python -m filerenamer.batch manifest.json --workers 8 --per-device 2 --output report.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List
+
+from filerenamer.core import FileRenamer, run_operations
+
+# Validation issues kept per failed step in the report
+MAX_REPORTED_ISSUES = 20
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    Read a manifest file and return normalized jobs: { "target", "operations", "filter", "dry_run" }.
+    Raises ValueError if the manifest is malformed.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ValueError("Manifest must be a list of jobs or an object with a 'jobs' list")
+
+    default_operations = data.get("operations", [])
+    default_filter = data.get("filter")
+    default_dry_run = bool(data.get("dry_run", False))
+    jobs = []
+    for entry in data["jobs"]:
+        if isinstance(entry, str):
+            entry = {"target": entry}
+        if not isinstance(entry, dict) or not entry.get("target"):
+            raise ValueError(f"Invalid job entry: {entry!r}")
+        jobs.append({
+            "target": os.path.abspath(entry["target"]),
+            "operations": entry.get("operations", default_operations),
+            "filter": entry.get("filter", default_filter),
+            "dry_run": bool(entry.get("dry_run", default_dry_run)),
+        })
+    return jobs
+
+
+def run_job(job: Dict) -> Dict:
+    """
+    Run one directory's pipeline. Never raises, errors are reported in the result.
+    Runs in a worker process, so only counts and issues (not mappings) are returned.
+    """
+    start = time.perf_counter()
+    result = {"target": job["target"], "dry_run": job["dry_run"], "status": "ok", "steps": []}
+    # Owned here so the steps already applied are still reported if a later one raises
+    steps: List[Dict] = []
+    try:
+        fr = FileRenamer(job["target"])
+        run_operations(fr, job["operations"], dry_run=job["dry_run"], file_filter=job.get("filter"), steps=steps)
+        if any(step["validation"] and step["validation"]["errors"] for step in steps):
+            result["status"] = "invalid"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    for step in steps:
+        # Steps after a failing dry-run step are listed but not evaluated
+        validation = step["validation"] or {"errors": [], "warnings": []}
+        result["steps"].append({
+            "operation": step["operation"],
+            "evaluated": step["evaluated"],
+            "files": len(step["mapping"]) if step["evaluated"] else None,
+            "applied": step["applied"],
+            "renamed": step["renamed"],
+            "errors": validation["errors"][:MAX_REPORTED_ISSUES],
+            "error_count": len(validation["errors"]),
+            "warning_count": len(validation["warnings"]),
+        })
+    result["renamed"] = sum(step["renamed"] for step in result["steps"])
+    result["duration_s"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def mount_points() -> List[str]:
+    """
+    Mount points from /proc/self/mounts, longest first. Empty where there is no such table.
+    """
+    try:
+        with open("/proc/self/mounts", "r", encoding="utf-8", errors="surrogateescape") as f:
+            fields = [line.split() for line in f]
+    except OSError:
+        return []
+    # Spaces and other special characters are octal-escaped, e.g. "\040"
+    unescape = partial(re.sub, r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)))
+    points = {unescape(field[1]) for field in fields if len(field) > 1}
+    return sorted(points, key=len, reverse=True)
+
+
+def device_of(path: str, mounts: List[str]) -> str:
+    """
+    The mount point `path` lives on, worked out from the path alone: stat'ing the target
+    here would let one hung network mount block the whole batch before any job starts.
+    Without a mount table, falls back to the drive (Windows) or the root.
+    Symlinks aren't resolved, so a link into another mount is grouped by where it sits.
+    """
+    for mount in mounts:
+        if path == mount or path.startswith(mount.rstrip(os.sep) + os.sep):
+            return mount
+    return os.path.splitdrive(path)[0] or os.sep
+
+
+def run_batch(jobs: List[Dict], workers: int = None, per_device: int = 2) -> Dict:
+    """
+    Run `jobs` across a process pool with at most `workers` jobs in flight overall and
+    at most `per_device` per filesystem (mount point). Returns the consolidated report.
+    The parent never touches the targets, so a slow mount only holds up its own jobs.
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    # Per-device queues, drained round-robin so every device makes progress
+    mounts = mount_points()
+    queues: Dict = {}
+    for index, job in enumerate(jobs):
+        queues.setdefault(device_of(job["target"], mounts), []).append(index)
+    in_flight = {device: 0 for device in queues}
+    busy_targets = set()  # a directory listed twice is never processed concurrently
+    results: List[Dict] = [None] * len(jobs)
+    running = {}
+
+    def fill(pool):
+        progressed = True
+        while progressed and len(running) < workers:
+            progressed = False
+            for device, queue in queues.items():
+                if not queue or in_flight[device] >= per_device or len(running) >= workers:
+                    continue
+                index = next((i for i in queue if jobs[i]["target"] not in busy_targets), None)
+                if index is None:
+                    continue
+                queue.remove(index)
+                running[pool.submit(run_job, jobs[index])] = (index, device)
+                in_flight[device] += 1
+                busy_targets.add(jobs[index]["target"])
+                progressed = True
+
+    def failed(index: int, error: str) -> Dict:
+        return {
+            "target": jobs[index]["target"], "dry_run": jobs[index]["dry_run"],
+            "status": "failed", "error": error, "steps": [], "renamed": 0, "duration_s": None,
+        }
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        fill(pool)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                index, device = running.pop(future)
+                in_flight[device] -= 1
+                busy_targets.discard(jobs[index]["target"])
+                try:
+                    results[index] = future.result()
+                except Exception as e:  # the worker itself died
+                    broken = broken or isinstance(e, BrokenProcessPool)
+                    results[index] = failed(index, f"{type(e).__name__}: {e}")
+            if broken:
+                # Jobs still running on the dead pool can't be trusted, report them and move on
+                for future, (index, device) in running.items():
+                    in_flight[device] -= 1
+                    busy_targets.discard(jobs[index]["target"])
+                    results[index] = failed(index, "Worker pool crashed while this job was running")
+                running.clear()
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=workers)
+            fill(pool)
+    finally:
+        pool.shutdown()
+
+    statuses = [r["status"] for r in results]
+    durations = [r["duration_s"] for r in results if r["duration_s"] is not None]
+    return {
+        "summary": {
+            "jobs": len(jobs),
+            "ok": statuses.count("ok"),
+            "invalid": statuses.count("invalid"),
+            "failed": statuses.count("failed"),
+            "renamed": sum(r["renamed"] for r in results),
+            "devices": len(queues),
+            "workers": workers,
+            "per_device": per_device,
+            "wall_time_s": round(time.perf_counter() - start, 4),
+            "job_time_s": round(sum(durations), 4),
+            "slowest_job_s": max(durations, default=0),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run FileRenamer operations over many directories.")
+    parser.add_argument("manifest", help="Path to a JSON manifest of jobs.")
+    parser.add_argument(
+        "--workers", "-w", type=int, default=None,
+        help="Maximum number of directories processed at once (default: CPU count)."
+    )
+    parser.add_argument(
+        "--per-device", type=int, default=2,
+        help="Maximum number of directories processed at once per filesystem device."
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Validate every job without renaming anything."
+    )
+    parser.add_argument(
+        "--output", "-o",
+        help="Write the JSON report here instead of stdout."
+    )
+    args = parser.parse_args()
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.dry_run:
+        for job in jobs:
+            job["dry_run"] = True
+
+    report = run_batch(jobs, workers=args.workers, per_device=max(1, args.per_device))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    s = report["summary"]
+    print(
+        f"{s['jobs']} job(s): {s['ok']} ok, {s['invalid']} invalid, {s['failed']} failed, "
+        f"{s['renamed']} file(s) renamed in {s['wall_time_s']}s",
+        file=sys.stderr
+    )
+    sys.exit(0 if s["ok"] == s["jobs"] else 1)
+
+
+if __name__ == "__main__":
+    main()
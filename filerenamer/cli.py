@@ -24,14 +24,107 @@ Usage Examples:
     # Add content from .txt files to filenames
     python -m file_renamer.cli --target ./photos --add-from-file "Title: (.*)"
 
+    # Preview and validate the combined result of several operations without renaming
+    python -m file_renamer.cli --target ./photos --prefix "PRE_" --enum --dry-run
+
+    # Only touch .jpg files over 1 MB modified in the last week
+    python -m file_renamer.cli --target ./photos --ext jpg --min-size 1M --modified-after 7d --prefix "PRE_"
+
 """
 
+import os
 import sys
-import argparse
-from filerenamer.core import FileRenamer
 
-def main():
-    parser = argparse.ArgumentParser(description="Batch rename files via FileRenamer.")
+# argparse and filerenamer.core are imported inside run() so that forwarding to a
+# running daemon (see filerenamer.daemon) doesn't pay for them on every invocation.
+
+def build_operations(args) -> list:
+    """
+    Turn parsed arguments into an ordered list of operation dicts
+    (see filerenamer.core.build_mapping).
+    """
+    operations = []
+
+    # Replace operations
+    if args.replace:
+        for pair in args.replace:
+            if "=" not in pair:
+                print(f"Invalid replace format: '{pair}'. Use old=new.")
+                continue
+            old, new = pair.split("=", 1)
+            operations.append({"action": "replace", "change_this": old, "to_this": new})
+
+    # Prefix
+    if args.prefix:
+        operations.append({"action": "prefix", "prefix": args.prefix})
+
+    # Suffix
+    if args.suffix:
+        operations.append({"action": "suffix", "suffix": args.suffix})
+
+    # Enumerate
+    if args.enum:
+        operations.append({"action": "enum", "start": args.enum_start, "loc": args.enum_loc, "sep": args.enum_sep})
+
+    # Rename with enum
+    if args.rename_with_enum:
+        operations.append({"action": "rename_with_enum", "basename": args.rename_with_enum})
+
+    # Add from file
+    if args.add_from_file:
+        operations.append({"action": "add_from_file", "pattern": args.add_from_file, "loc": args.add_loc})
+
+    return operations
+
+def build_filter(args) -> dict:
+    """
+    Turn parsed filter arguments into a filter spec dict (see filerenamer.filters),
+    empty when no filter option was given.
+    """
+    spec = {
+        "glob": args.glob,
+        "regex": args.regex,
+        "ext": args.ext,
+        "min_size": args.min_size,
+        "max_size": args.max_size,
+        "modified_after": args.modified_after,
+        "modified_before": args.modified_before,
+        "type": args.type,
+    }
+    return {key: value for key, value in spec.items() if value is not None}
+
+def describe_operation(operation: dict) -> str:
+    """
+    Short human-readable label for an operation dict, e.g. "prefix prefix='PRE_'".
+    """
+    params = " ".join(f"{key}={value!r}" for key, value in operation.items() if key != "action")
+    return f"{operation.get('action')} {params}".strip()
+
+def print_report(label: str, mapping: dict, validation: dict, show_mapping: bool = True) -> None:
+    """
+    Print a mapping and its validation issues for one operation.
+    """
+    print(f"== {label}: {len(mapping)} file(s)")
+    if show_mapping:
+        for old, new in mapping.items():
+            print(f"  {old} -> {new}")
+    for level in ("errors", "warnings"):
+        for issue in validation[level]:
+            print(f"  {level[:-1].upper()} [{issue['kind']}] {issue['message']}")
+
+def run(argv: list = None, renamers: dict = None, listing=None) -> int:
+    """
+    Parse `argv` and perform the requested operations, returning the exit code.
+
+    `renamers` is an optional { abs_directory: FileRenamer } cache so undo/redo history
+    survives between calls, and `listing(directory)` an optional function returning a
+    (possibly cached) sorted listing to build mappings from. Both are used by the daemon.
+    """
+    import argparse
+    from filerenamer.core import FileRenamer, run_operations
+    from filerenamer.filters import compile_filter
+
+    parser = argparse.ArgumentParser(prog="filerenamer.cli", description="Batch rename files via FileRenamer.")
     parser.add_argument(
         "--target", "-t", required=True,
         help="Target directory (must be an existing directory)."
@@ -72,6 +165,33 @@ def main():
         "--add-loc", choices=["start", "end"], default="end",
         help="Location for add-from-file: 'start' or 'end'."
     )
+    parser.add_argument(
+        "--glob", action="append",
+        help="Only rename names matching this shell pattern. Can be used multiple times (any matches)."
+    )
+    parser.add_argument(
+        "--regex", help="Only rename names containing a match for this regular expression."
+    )
+    parser.add_argument(
+        "--ext", action="append",
+        help="Only rename files with this extension. Can be used multiple times."
+    )
+    parser.add_argument(
+        "--min-size", help="Only rename files at least this large, e.g. 500K or 1M."
+    )
+    parser.add_argument(
+        "--max-size", help="Only rename files at most this large, e.g. 500K or 1M."
+    )
+    parser.add_argument(
+        "--modified-after", help="Only rename files modified after this ISO date, epoch time or age (e.g. 7d)."
+    )
+    parser.add_argument(
+        "--modified-before", help="Only rename files modified before this ISO date, epoch time or age (e.g. 7d)."
+    )
+    parser.add_argument(
+        "--type", choices=["file", "dir"],
+        help="Only rename regular files or only directories."
+    )
     parser.add_argument(
         "--undo", action="store_true",
         help="Undo last operation."
@@ -80,18 +200,30 @@ def main():
         "--redo", action="store_true",
         help="Redo last undone operation."
     )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Print and validate the planned renames without applying them."
+    )
     parser.add_argument(
         "--yes", "-y", action="store_true",
         help="Skip confirmation prompts (assumes yes)."
     )
 
-    args = parser.parse_args()
-
     try:
-        fr = FileRenamer(args.target)
-    except ValueError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
+        args = parser.parse_args(argv)
+    except SystemExit as e:  # --help and usage errors, so a daemon caller isn't terminated
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+    directory = os.path.abspath(args.target)
+    fr = renamers.get(directory) if renamers is not None else None
+    if fr is None:
+        try:
+            fr = FileRenamer(directory)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        if renamers is not None:
+            renamers[directory] = fr
 
     # Undo/redo take precedence
     if args.undo:
@@ -100,8 +232,8 @@ def main():
             print("Undo successful.")
         except Exception as e:
             print(f"Undo failed: {e}")
-            sys.exit(1)
-        sys.exit(0)
+            return 1
+        return 0
 
     if args.redo:
         try:
@@ -109,51 +241,51 @@ def main():
             print("Redo successful.")
         except Exception as e:
             print(f"Redo failed: {e}")
-            sys.exit(1)
-        sys.exit(0)
-
-    performed = False
-
-    # Replace operations
-    if args.replace:
-        for pair in args.replace:
-            if "=" not in pair:
-                print(f"Invalid replace format: '{pair}'. Use old=new.")
-                continue
-            old, new = pair.split("=", 1)
-            fr.replace(old, new)
-            performed = True
+            return 1
+        return 0
 
-    # Prefix
-    if args.prefix:
-        fr.prefix(args.prefix)
-        performed = True
-
-    # Suffix
-    if args.suffix:
-        fr.suffix(args.suffix)
-        performed = True
-
-    # Enumerate
-    if args.enum:
-        fr.enum(start=args.enum_start, loc=args.enum_loc, sep=args.enum_sep)
-        performed = True
+    operations = build_operations(args)
+    if not operations:
+        print("No operation specified. Use --help for options.")
+        return 0
 
-    # Rename with enum
-    if args.rename_with_enum:
-        fr.rename_with_enum(args.rename_with_enum)
-        performed = True
+    try:
+        file_filter = compile_filter(build_filter(args))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
 
-    # Add from file
-    if args.add_from_file:
-        fr.add_from_file(args.add_from_file, loc=args.add_loc)
-        performed = True
+    try:
+        steps = run_operations(fr, operations, dry_run=args.dry_run, listing=listing, file_filter=file_filter)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if args.dry_run:
+        for step in steps:
+            if step["evaluated"]:
+                print_report(describe_operation(step["operation"]), step["mapping"], step["validation"])
+            else:
+                print(f"== {describe_operation(step['operation'])}: not evaluated, an earlier operation has errors")
+        return 1 if any(step["validation"] and step["validation"]["errors"] for step in steps) else 0
 
-    if not performed:
-        print("No operation specified. Use --help for options.")
-        sys.exit(0)
+    last = steps[-1]
+    if not last["applied"]:
+        print_report(describe_operation(last["operation"]), last["mapping"], last["validation"], show_mapping=False)
+        print("Aborting, nothing was renamed for this operation.")
+        return 1
 
     print("Operations completed successfully.")
+    return 0
+
+def main():
+    # Hand the invocation to a warm daemon process when one is configured and reachable
+    socket_path = os.environ.get("FILERENAMER_SOCKET")
+    if socket_path:
+        from filerenamer.daemon import forward
+        code = forward(socket_path, sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+    sys.exit(run(sys.argv[1:]))
 
 if __name__ == "__main__":
     main()
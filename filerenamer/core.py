@@ -4,7 +4,14 @@ Core logic and data structures for file renaming functionality
 
 import os
 import re
-from typing import Dict
+import sys
+from array import array
+from collections import Counter
+from functools import partial
+from itertools import count
+from typing import Collection, Dict, Iterable, List, Mapping, Optional, Union
+from filerenamer.filters import FileFilter, compile_filter, scan, select
+from filerenamer.mapping import CompactMapping, DeltaRule, StringTable, compact
 
 class FileRenamer:
     """
@@ -12,6 +19,9 @@ class FileRenamer:
     then use one of the mapping methods to generate { old_name: new_name } or use chainable
     methods to build and apply in a single step. Supports undo/redo of each batch operation.
 
+    Mappings are read-only `CompactMapping`s (see filerenamer.mapping) that share the
+    directory listing and compute new names on demand. Use dict(mapping) for a plain dict.
+
     Properties
     ----------
     directory : str
@@ -19,21 +29,28 @@ class FileRenamer:
 
     Methods
     -------
-    replace_mapping(change_this, to_this) -> Dict[str, str]
+    replace_mapping(change_this, to_this) -> Mapping[str, str]
         Build a mapping to replace occurrences of `change_this` with `to_this` in filenames.
-    prefix_mapping(prefix) -> Dict[str, str]
+    prefix_mapping(prefix) -> Mapping[str, str]
         Build a mapping to add `prefix` to all filenames not already starting with it.
-    suffix_mapping(suffix) -> Dict[str, str]
+    suffix_mapping(suffix) -> Mapping[str, str]
         Build a mapping to add `suffix` (before extension) to all filenames not already ending with it.
-    enum_mapping(start=1, loc="end", sep="_") -> Dict[str, str]
+    enum_mapping(start=1, loc="end", sep="_") -> Mapping[str, str]
         Build a mapping to enumerate files by appending (loc="end") or prepending (loc="start") an
         increasing number beginning at `start`, separated by `sep`.
-    rename_with_enum_mapping(basename) -> Dict[str, str]
+    rename_with_enum_mapping(basename) -> Mapping[str, str]
         Build a mapping to rename each file to `basename + index + original_extension`.
-    add_from_file_mapping(pattern, loc="end") -> Dict[str, str]
+    add_from_file_mapping(pattern, loc="end") -> Mapping[str, str]
         Build a mapping by searching each .txt file in `directory` for `pattern` 
         (a regex with a capture group) and appending (loc="end") or prepending (loc="start") the
         first captured group to its filename.
+    operation_mapping(operation, filenames=None) -> Mapping[str, str]
+        Build a mapping from an operation dict such as {"action": "prefix", "prefix": "PRE_"},
+        from `filenames` if given. See `build_mapping` for the supported actions.
+    validate_mapping(mapping, filenames=None) -> Dict[str, List[Dict[str, str]]]
+        Check a mapping against the current directory listing (or `filenames`) without
+        touching disk and return { "errors": [...], "warnings": [...] }. Passing the listing
+        the mapping was built from saves reading the directory again.
     apply_mapping(mapping) -> FileRenamer
         Apply the given mapping of old_name: new_name to disk and record the operation for undo.
 
@@ -46,16 +63,23 @@ class FileRenamer:
     rename_with_enum(basename) -> FileRenamer           Build and apply a rename-with-enumeration mapping.
     add_from_file(pattern, loc="end") -> FileRenamer    Build and apply an "add from file" mapping.
 
+    Every mapping and chainable method also takes an optional `file_filter` (a filter spec
+    dict or FileFilter, see filerenamer.filters) restricting it to matching files.
+
     Undo/Redo
     ---------
     undo() -> FileRenamer       Revert the most recently applied mapping. Raises IndexError if no history.
     redo() -> FileRenamer       Reapply the most recently undone mapping. Raises IndexError if nothing to redo.
+
+    `last_renamed` holds the number of files actually renamed by the last apply, undo or redo
+    (entries whose source is gone or whose target is taken are skipped).
     """
 
     def __init__(self, directory: str = None):
         self.directory = directory
         self._history = []       # stack of applied mappings for undo
         self._redo_stack = []    # stack for redo
+        self.last_renamed = 0
 
     @property
     def directory(self):
@@ -78,54 +102,66 @@ class FileRenamer:
         files = os.listdir(self.directory)
         return sorted(files) if sort else files
 
-    def replace_mapping(self, change_this: str, to_this: str) -> Dict[str, str]:
-        return build_replace_mapping(self.directory, change_this, to_this)
+    def replace_mapping(self, change_this: str, to_this: str, file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_replace_mapping(self.directory, change_this, to_this, file_filter=file_filter)
 
-    def prefix_mapping(self, prefix: str) -> Dict[str, str]:
-        return build_prefix_mapping(self.directory, prefix)
+    def prefix_mapping(self, prefix: str, file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_prefix_mapping(self.directory, prefix, file_filter=file_filter)
 
-    def suffix_mapping(self, suffix: str) -> Dict[str, str]:
-        return build_suffix_mapping(self.directory, suffix)
+    def suffix_mapping(self, suffix: str, file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_suffix_mapping(self.directory, suffix, file_filter=file_filter)
 
-    def enum_mapping(self, start: int = 1, loc: str = "end", sep: str = "_") -> Dict[str, str]:
-        return build_enum_mapping(self.directory, start, loc, sep)
+    def enum_mapping(self, start: int = 1, loc: str = "end", sep: str = "_", file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_enum_mapping(self.directory, start, loc, sep, file_filter=file_filter)
 
-    def rename_with_enum_mapping(self, basename: str) -> Dict[str, str]:
-        return build_rename_with_enum(self.directory, basename)
+    def rename_with_enum_mapping(self, basename: str, file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_rename_with_enum(self.directory, basename, file_filter=file_filter)
 
-    def add_from_file_mapping(self, pattern: str, loc: str = "end") -> Dict[str, str]:
-        return build_add_from_file_mapping(self.directory, pattern, loc)
+    def add_from_file_mapping(self, pattern: str, loc: str = "end", file_filter: Union[None, Dict, FileFilter] = None) -> Mapping[str, str]:
+        return build_add_from_file_mapping(self.directory, pattern, loc, file_filter=file_filter)
 
-    def apply_mapping(self, mapping: Dict[str, str]) -> "FileRenamer":
-        # Record mapping for undo/redo
-        self._history.append(mapping)
+    def operation_mapping(
+        self,
+        operation: Dict,
+        file_filter: Union[None, Dict, FileFilter] = None,
+        filenames: Optional[Iterable[str]] = None
+    ) -> Mapping[str, str]:
+        return build_mapping(self.directory, operation, filenames, file_filter)
+
+    def validate_mapping(self, mapping: Mapping[str, str], filenames: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, str]]]:
+        return validate_mapping(self.directory, mapping, filenames)
+
+    def apply_mapping(self, mapping: Mapping[str, str]) -> "FileRenamer":
+        # Record mapping for undo/redo, compacted so long histories stay small. The compact
+        # copy keeps the entry order, which decides the outcome when targets are also sources.
+        self._history.append(compact(mapping))
         self._redo_stack.clear()
-        apply_mapping(self.directory, mapping)
+        self.last_renamed = apply_mapping(self.directory, mapping)
         return self
 
     # --- Chainable Methods (build & apply in one step) ---
-    def replace(self, change_this: str, to_this: str) -> "FileRenamer":
-        mapping = self.replace_mapping(change_this, to_this)
+    def replace(self, change_this: str, to_this: str, file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.replace_mapping(change_this, to_this, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
-    def prefix(self, prefix: str) -> "FileRenamer":
-        mapping = self.prefix_mapping(prefix)
+    def prefix(self, prefix: str, file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.prefix_mapping(prefix, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
-    def suffix(self, suffix: str) -> "FileRenamer":
-        mapping = self.suffix_mapping(suffix)
+    def suffix(self, suffix: str, file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.suffix_mapping(suffix, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
-    def enum(self, start: int = 1, loc: str = "end", sep: str = "_") -> "FileRenamer":
-        mapping = self.enum_mapping(start, loc, sep)
+    def enum(self, start: int = 1, loc: str = "end", sep: str = "_", file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.enum_mapping(start, loc, sep, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
-    def rename_with_enum(self, basename: str) -> "FileRenamer":
-        mapping = self.rename_with_enum_mapping(basename)
+    def rename_with_enum(self, basename: str, file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.rename_with_enum_mapping(basename, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
-    def add_from_file(self, pattern: str, loc: str = "end") -> "FileRenamer":
-        mapping = self.add_from_file_mapping(pattern, loc)
+    def add_from_file(self, pattern: str, loc: str = "end", file_filter: Union[None, Dict, FileFilter] = None) -> "FileRenamer":
+        mapping = self.add_from_file_mapping(pattern, loc, file_filter=file_filter)
         return self.apply_mapping(mapping)
 
     # --- Undo/Redo methods ---
@@ -133,9 +169,9 @@ class FileRenamer:
         if not self._history:
             raise IndexError("No operations to undo")
         last_mapping = self._history.pop()
-        inverted = {new: old for old, new in last_mapping.items()}
-        # Apply inverted mapping without recording in history
-        apply_mapping(self.directory, inverted)
+        # Apply inverted pairs, last first, without recording in history
+        inverted = [(new, old) for old, new in last_mapping.items()]
+        self.last_renamed = _apply_pairs(self.directory, reversed(inverted))
         self._redo_stack.append(last_mapping)
         return self
 
@@ -143,7 +179,7 @@ class FileRenamer:
         if not self._redo_stack:
             raise IndexError("No operations to redo")
         mapping = self._redo_stack.pop()
-        apply_mapping(self.directory, mapping)
+        self.last_renamed = apply_mapping(self.directory, mapping)
         self._history.append(mapping)
         return self
     
@@ -175,27 +211,68 @@ class FileRenamerSingleton:
 Stateless file-renaming functions
 """
 
+# Longest filename (in bytes) accepted by common filesystems (ext4, APFS, NTFS)
+MAX_NAME_BYTES = 255
+
+# Characters that can never appear in a filename on this platform
+if os.name == "nt":
+    INVALID_NAME_CHARS = frozenset('<>:"/\\|?*' + "".join(chr(c) for c in range(32)))
+else:
+    INVALID_NAME_CHARS = frozenset("/\0")
+
+# Names that can never be used, whatever they contain
+_RESERVED_NAMES = frozenset(("", ".", ".."))
+
+# Platforms whose default filesystems treat "a.jpg" and "A.JPG" as the same file
+CASE_INSENSITIVE_FS = os.name == "nt" or sys.platform == "darwin"
+
+def _listing(
+    directory: str,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> StringTable:
+    """
+    Return `filenames`, or the contents of `directory` if none are given, as a sorted
+    StringTable. A StringTable passed in is assumed sorted and shared as-is.
+    With `file_filter`, only matching names are kept (see filerenamer.filters).
+    """
+    file_filter = compile_filter(file_filter)
+    if file_filter is not None:
+        return select(directory, file_filter, filenames)
+    if isinstance(filenames, StringTable):
+        return filenames
+    if filenames is None:
+        filenames = os.listdir(directory)
+    return StringTable(sorted(filenames))
+
+def _replace_rule(change_this: str, to_this: str, position: int, old: str) -> str:
+    return old.replace(change_this, to_this)
+
 def build_replace_mapping(
     directory: str,
     change_this: str,
-    to_this: str
-) -> Dict[str, str]:
+    to_this: str,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Scan `directory` for any file that contains `change_this` in its name,
     and build a mapping { old_name: new_name } without touching disk.
     """
-    out: Dict[str, str] = {}
-    for fname in sorted(os.listdir(directory)):
-        if change_this in fname:
-            new_name = fname.replace(change_this, to_this)
-            out[fname] = new_name
-    return out
+    names = _listing(directory, filenames, file_filter)
+    keys = array("I", (i for i, fname in enumerate(names) if change_this in fname))
+    return CompactMapping(names, keys, partial(_replace_rule, change_this, to_this))
 
-def apply_mapping(directory: str, mapping: Dict[str, str]) -> None:
+def apply_mapping(directory: str, mapping: Mapping[str, str]) -> int:
     """
     Actually perform os.rename(old → new) on each pair in `mapping`.
+    Returns the number of files renamed.
     """
-    for old, new in mapping.items():
+    return _apply_pairs(directory, mapping.items())
+
+def _apply_pairs(directory: str, pairs: Iterable) -> int:
+    renamed = 0
+    for old, new in pairs:
         old_path = os.path.join(directory, old)
         new_path = os.path.join(directory, new)
         if not os.path.exists(old_path):
@@ -205,91 +282,283 @@ def apply_mapping(directory: str, mapping: Dict[str, str]) -> None:
             # TODO handle new path collisions
             continue
         os.rename(old_path, new_path)
+        renamed += 1
+    return renamed
 
 
+def _invalid_name_reason(name: str) -> Optional[str]:
+    """
+    Return why `name` can't be used as a filename, or None if it looks fine.
+    """
+    if name in _RESERVED_NAMES:
+        return f"'{name}' is not a valid filename"
+    bad = INVALID_NAME_CHARS.intersection(name)
+    if bad:
+        return f"'{name}' contains invalid characters: {' '.join(repr(c) for c in sorted(bad))}"
+    if os.name == "nt" and name[-1] in " .":
+        return f"'{name}' ends with a space or period"
+    if len(name.encode("utf-8", "surrogateescape")) > MAX_NAME_BYTES:
+        return f"'{name}' is longer than {MAX_NAME_BYTES} bytes"
+    return None
+
+def _plainly_valid(existing: set, untouched: set, news: Collection[str], n: int) -> bool:
+    """
+    Cheap all-clear for validate_mapping: True only if none of its checks can fire for
+    these `n` new names. False means "look closer", not that something is wrong.
+    """
+    if n == 0:
+        return True
+    # No target is a name on disk, so none is taken, chained or a no-op
+    if not existing.isdisjoint(news):
+        return False
+    # The character and length checks scan one joined string. Names can't contain NUL, so
+    # anything but n - 1 separators means some name has one.
+    joined = "\0".join(news)
+    if joined.count("\0") != n - 1 or any(char in joined for char in INVALID_NAME_CHARS if char != "\0"):
+        return False
+    if not _RESERVED_NAMES.isdisjoint(news):
+        return False
+    if os.name == "nt" and re.search(r"[ .](?:\0|$)", joined):
+        return False
+    # utf-8 uses at most 4 bytes per character, exactly one for ASCII
+    limit = MAX_NAME_BYTES if joined.isascii() else MAX_NAME_BYTES // 4
+    if re.search(f"\0[^\0]{{{limit + 1}}}", "\0" + joined):
+        return False
+    # Case clashes only matter where a target is involved: among the targets (which also
+    # catches plain duplicates), or between a target and a file left in place
+    folded = joined.casefold()
+    folded_news = news if folded == joined else folded.split("\0")
+    if len(set(folded_news)) != n:
+        return False
+    return not untouched or set(map(str.casefold, untouched)).isdisjoint(folded_news)
+
+def validate_mapping(
+    directory: str,
+    mapping: Mapping[str, str],
+    filenames: Optional[Iterable[str]] = None
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Check `mapping` against the listing of `directory` (or `filenames`) without touching disk.
+
+    Every check is a set/dict or string operation over the whole mapping, so validation is
+    O(n) and mostly runs in C. A clean mapping is cleared in a few bulk passes; the mapping
+    is only walked entry by entry when something was flagged, to report issues in mapping order.
+
+    Returns { "errors": [...], "warnings": [...] } where each issue is
+    { "kind": ..., "old": ..., "new": ..., "message": ... }. Kinds:
+      missing_source    `old` is not in the directory
+      duplicate_target  several files would be renamed to `new`
+      existing_target   `new` is already taken by a file that isn't being renamed
+      chained_target    `new` is another file's old name, so it depends on apply order
+      case_conflict     `new` differs only by case from another final name
+                        (an error on case-insensitive platforms, otherwise a warning)
+      invalid_name      `new` is not a usable filename on this platform
+      name_too_long     `new` is longer than MAX_NAME_BYTES when encoded
+    """
+    if isinstance(mapping, CompactMapping) and mapping.names is filenames:
+        # Built from this very listing: no source can be missing. Slice the names out of the
+        # table once and take the sources from those same str objects, so each name is
+        # created and hashed once rather than once per set operation.
+        listing = list(filenames)
+        existing = set(listing)
+        mapped = mapping.keys_index
+        news = list(map(mapping.rule, count(), map(listing.__getitem__, mapped)))
+        missing = set()
+        if len(mapped) == len(listing):
+            untouched = set()
+        else:
+            untouched = existing.difference(map(listing.__getitem__, mapped))
+        if _plainly_valid(existing, untouched, news, len(news)):
+            return {"errors": [], "warnings": []}
+        targets = set(news)
+        overlap = targets.intersection(existing).difference(untouched)
+    else:
+        existing = set(os.listdir(directory) if filenames is None else filenames)
+        if existing.issuperset(mapping):
+            untouched = existing.difference(mapping) if len(existing) != len(mapping) else set()
+            news = mapping.values() if isinstance(mapping, dict) else list(mapping.values())
+            if _plainly_valid(existing, untouched, news, len(mapping)):
+                return {"errors": [], "warnings": []}
+        targets = set(mapping.values())
+        sources = set(mapping)
+        missing = sources.difference(existing)
+        untouched = existing.difference(sources)
+        overlap = targets.intersection(sources)
+
+    # Drop no-op entries (old == new); they can only show up where a target is also a source
+    moves = mapping
+    if any(mapping[name] == name for name in overlap):
+        moves = {old: new for old, new in mapping.items() if old != new}
+        sources = set(moves)
+        targets = set(moves.values())
+        missing = sources.difference(existing)
+        untouched = existing.difference(sources)
+        overlap = targets.intersection(sources)
+
+    taken = targets.intersection(untouched)
+
+    duplicates: Dict[str, int] = {}
+    if len(targets) != len(moves):
+        duplicates = {name: n for name, n in Counter(moves.values()).items() if n > 1}
+
+    invalid: Dict[str, str] = {}
+    longest = max(map(len, targets), default=0)
+    if (
+        not INVALID_NAME_CHARS.isdisjoint("".join(targets))
+        or targets.intersection(_RESERVED_NAMES)
+        or longest * 4 > MAX_NAME_BYTES  # utf-8 uses at most 4 bytes per character
+        or os.name == "nt"
+    ):
+        for name in targets:
+            reason = _invalid_name_reason(name)
+            if reason:
+                invalid[name] = reason
+
+    # Final directory contents grouped by casefold, only built once a target may clash: with
+    # another target, or with a file left in place
+    folded: Dict[str, List[str]] = {}
+    folded_targets = set(map(str.casefold, targets))
+    if len(folded_targets) != len(targets) or not folded_targets.isdisjoint(map(str.casefold, untouched)):
+        final_names = untouched.union(targets)
+        for name in final_names:
+            folded.setdefault(name.casefold(), []).append(name)
+        folded = {key: names for key, names in folded.items() if len(names) > 1}
+
+    errors: List[Dict[str, str]] = []
+    warnings: List[Dict[str, str]] = []
+    if not (missing or taken or overlap or duplicates or invalid or folded):
+        return {"errors": errors, "warnings": warnings}
+
+    case_issues = errors if CASE_INSENSITIVE_FS else warnings
+
+    def issue(kind: str, old: str, new: str, message: str) -> Dict[str, str]:
+        return {"kind": kind, "old": old, "new": new, "message": message}
+
+    for old, new in moves.items():
+        if old in missing:
+            errors.append(issue("missing_source", old, new, f"'{old}' does not exist"))
+        if new in invalid:
+            kind = "name_too_long" if invalid[new].endswith(" bytes") else "invalid_name"
+            errors.append(issue(kind, old, new, invalid[new]))
+        if new in duplicates:
+            errors.append(issue("duplicate_target", old, new, f"{duplicates[new]} files would be renamed to '{new}'"))
+        if new in taken:
+            errors.append(issue("existing_target", old, new, f"'{new}' already exists"))
+        elif new in overlap:
+            errors.append(issue("chained_target", old, new, f"'{new}' is itself being renamed to '{moves[new]}'"))
+        clashes = folded.get(new.casefold()) if folded else None
+        if clashes:
+            others = ", ".join(f"'{n}'" for n in sorted(clashes) if n != new)
+            case_issues.append(issue("case_conflict", old, new, f"'{new}' differs only by case from {others}"))
+
+    return {"errors": errors, "warnings": warnings}
+
+
+def _prefix_rule(prefix: str, position: int, old: str) -> str:
+    return prefix + old
+
 def build_prefix_mapping(
     directory: str,
-    prefix: str
-) -> Dict[str, str]:
+    prefix: str,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Add `prefix` to every filename in `directory` that does not already start with it.
     """
-    return {
-        filename: prefix + filename
-        for filename in sorted(os.listdir(directory))
-        if not filename.startswith(prefix)
-    }
+    names = _listing(directory, filenames, file_filter)
+    keys = array("I", (i for i, filename in enumerate(names) if not filename.startswith(prefix)))
+    return CompactMapping(names, keys, partial(_prefix_rule, prefix))
+
+def _suffix_rule(suffix: str, position: int, old: str) -> str:
+    root, ext = os.path.splitext(old)
+    return root + suffix + ext
 
 def build_suffix_mapping(
     directory: str,
-    suffix: str
-) -> Dict[str, str]:
+    suffix: str,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Add `suffix` before the file extension for every filename in `directory`
     that does not already end with `suffix` (ignoring the extension).
     """
-    mapping: Dict[str, str] = {}
-    for filename in sorted(os.listdir(directory)):
-        root, ext = os.path.splitext(filename)
-        if root.endswith(suffix):
-            continue
-        new_name = root + suffix + ext
-        mapping[filename] = new_name
-    return mapping
+    names = _listing(directory, filenames, file_filter)
+    keys = array("I", (
+        i for i, filename in enumerate(names)
+        if not os.path.splitext(filename)[0].endswith(suffix)
+    ))
+    return CompactMapping(names, keys, partial(_suffix_rule, suffix))
+
+def _enum_rule(start: int, loc: str, sep: str, position: int, old: str) -> str:
+    root, ext = os.path.splitext(old)
+    number = str(position + start)
+    if loc == "start":
+        return number + root + ext
+    return root + sep + number + ext
 
 # TODO optional sort func
 def build_enum_mapping(
     directory: str,
     start: int = 1,
     loc: str = "end",
-    sep: str = "_"
-) -> Dict[str, str]:
+    sep: str = "_",
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Append (loc='end') or prepend (loc='start') an enumeration number to each filename.
     Enumeration starts at `start` and increments by 1, separated by `sep`.
     """
-    mapping: Dict[str, str] = {}
-    filenames = sorted(os.listdir(directory))
-    for idx, filename in enumerate(filenames):
-        root, ext = os.path.splitext(filename)
-        number = str(idx + start)
-        if loc == "start":
-            new_name = number + root + ext
-        else:
-            new_name = root + sep + number + ext
-        mapping[filename] = new_name
-    return mapping
+    names = _listing(directory, filenames, file_filter)
+    return CompactMapping(names, range(len(names)), partial(_enum_rule, start, loc, sep))
+
+def _rename_with_enum_rule(basename: str, position: int, old: str) -> str:
+    _, ext = os.path.splitext(old)
+    return f"{basename}{position + 1}{ext}"
 
 # TODO optional sort func
 def build_rename_with_enum(
     directory: str,
-    basename: str
-) -> Dict[str, str]:
+    basename: str,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Rename each file in `directory` to basename + index + original extension.
     Indexing starts at 1 and increases by 1 for each file.
     """
-    mapping: Dict[str, str] = {}
-    filenames = sorted(os.listdir(directory))
-    for idx, filename in enumerate(filenames):
-        _, ext = os.path.splitext(filename)
-        new_name = f"{basename}{idx + 1}{ext}"
-        mapping[filename] = new_name
-    return mapping
+    names = _listing(directory, filenames, file_filter)
+    return CompactMapping(names, range(len(names)), partial(_rename_with_enum_rule, basename))
 
 def build_add_from_file_mapping(
     directory: str,
     pattern: str,
-    loc: str = "end"
-) -> Dict[str, str]:
+    loc: str = "end",
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
     """
     Search inside each .txt file in `directory` for `pattern` (regex).
     If a match is found, append (loc='end') or prepend (loc='start')
     the first capture group to the filename, preserving extension.
+    New names are stored as deltas: the captured text and where it goes.
+    Raises ValueError if `pattern` doesn't compile or has no capture group.
     """
-    mapping: Dict[str, str] = {}
-    filenames = sorted(os.listdir(directory))
-    for filename in filenames:
+    try:
+        regex = re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern {pattern!r}: {e}") from None
+    if regex.groups < 1:
+        raise ValueError(f"Pattern {pattern!r} has no capture group")
+
+    names = _listing(directory, filenames, file_filter)
+    keys = array("I")
+    heads = array("I")
+    tails = array("I")
+    matches: List[str] = []
+    for i, filename in enumerate(names):
         if not filename.lower().endswith(".txt"):
             continue
         filepath = os.path.join(directory, filename)
@@ -298,14 +567,158 @@ def build_add_from_file_mapping(
                 text = f.read()
         except (IOError, OSError):
             continue
-        m = re.search(pattern, text)
-        if not m:
+        m = regex.search(text)
+        if not m or m.group(1) is None:
             continue
-        match_text = m.group(1)
         root, ext = os.path.splitext(filename)
+        keys.append(i)
+        matches.append(m.group(1))
         if loc == "start":
-            new_name = match_text + filename
+            heads.append(0)
+            tails.append(len(filename))
         else:
-            new_name = root + match_text + ext
-        mapping[filename] = new_name
-    return mapping
+            heads.append(len(root))
+            tails.append(len(ext))
+    return CompactMapping(names, keys, DeltaRule(heads, tails, StringTable(matches)))
+
+"""
+Operation pipeline shared by the web app, CLI and batch runner
+"""
+
+def _operation_arg(operation: Dict, key: str, default: Optional[str] = None) -> str:
+    """
+    The string `operation[key]`, or `default` if it's absent and one is given.
+    """
+    value = operation.get(key, default)
+    if value is None:
+        raise ValueError(f"'{operation.get('action')}' needs '{key}'")
+    if not isinstance(value, str):
+        raise ValueError(f"'{key}' must be a string, got {type(value).__name__}")
+    return value
+
+def build_mapping(
+    directory: str,
+    operation: Dict,
+    filenames: Optional[Iterable[str]] = None,
+    file_filter: Union[None, Dict, FileFilter] = None
+) -> Mapping[str, str]:
+    """
+    Build the mapping for an operation described as a dict, e.g.
+    {"action": "replace", "change_this": "foo", "to_this": "bar"}. Actions and keys:
+      replace           change_this, to_this
+      prefix            prefix
+      suffix            suffix
+      enum              start=1, loc="end", sep="_"
+      rename_with_enum  basename
+      add_from_file     pattern, loc="end"
+    `file_filter` restricts the operation to matching files (see filerenamer.filters).
+    Raises ValueError for an unknown action, a missing or mistyped key, a bad pattern or a
+    bad filter.
+    """
+    if not isinstance(operation, dict):
+        raise ValueError(f"An operation must be a dict, got {type(operation).__name__}")
+    action = operation.get("action")
+    arg = partial(_operation_arg, operation)
+    f = file_filter
+    if action == "replace":
+        return build_replace_mapping(directory, arg("change_this"), arg("to_this"), filenames, f)
+    if action == "prefix":
+        return build_prefix_mapping(directory, arg("prefix"), filenames, f)
+    if action == "suffix":
+        return build_suffix_mapping(directory, arg("suffix"), filenames, f)
+    if action == "enum":
+        start = operation.get("start", 1)
+        try:
+            if isinstance(start, bool):
+                raise TypeError
+            start = int(start)
+        except (TypeError, ValueError):
+            raise ValueError(f"'start' must be an integer, got {start!r}") from None
+        return build_enum_mapping(directory, start, arg("loc", "end"), arg("sep", "_"), filenames, f)
+    if action == "rename_with_enum":
+        return build_rename_with_enum(directory, arg("basename"), filenames, f)
+    if action == "add_from_file":
+        return build_add_from_file_mapping(directory, arg("pattern"), arg("loc", "end"), filenames, f)
+    raise ValueError(f"Unknown action: '{action}'")
+
+def _renamed_listing(filenames: Iterable[str], mapping: Mapping[str, str]) -> StringTable:
+    """
+    The sorted listing `filenames` would become once `mapping` is applied.
+    """
+    if isinstance(mapping, CompactMapping) and mapping.names is filenames:
+        return StringTable(sorted(mapping.renamed()))
+    return StringTable(sorted(mapping.get(name, name) for name in filenames))
+
+def run_operations(
+    renamer: FileRenamer,
+    operations: List[Dict],
+    dry_run: bool = False,
+    listing=None,
+    file_filter: Union[None, Dict, FileFilter] = None,
+    steps: Optional[List[Dict]] = None
+) -> List[Dict]:
+    """
+    Build, validate and apply each operation in order on `renamer`'s directory.
+
+    With `dry_run`, nothing touches disk: each step is built from the listing the previous
+    steps would leave behind. Once a step has errors that listing would be meaningless, so
+    the remaining steps are reported with "evaluated" False and no mapping or validation.
+    Note that add_from_file still reads each .txt file under its on-disk name.
+    Otherwise the pipeline stops before applying the first step with validation errors.
+
+    `file_filter` selects the files once, up front; later steps act on those same files
+    under their new names. Validation always checks against the whole directory, using the
+    listing the selection was scanned from.
+
+    `listing(directory)` may supply a (cached) sorted listing instead of reading the directory
+    (with a filter the directory is scanned anyway, so it isn't needed). It's only used before
+    anything is renamed: a cache keyed on the directory's mtime can miss our own renames, so
+    later steps of a real run always read the directory again.
+    Returns one { "operation", "evaluated", "mapping", "validation", "applied", "renamed" }
+    dict per step attempted, "renamed" being the number of files actually renamed. Steps are
+    appended to `steps` if given, so a caller still sees the steps already applied when a
+    later one raises.
+    """
+    directory = renamer.directory
+    if steps is None:
+        steps = []
+    # Compiled once, so relative times such as "7d" mean the same instant for every step
+    file_filter = compile_filter(file_filter)
+    selected = None
+    if file_filter is not None:
+        scanned, selected = scan(directory, file_filter)
+    else:
+        scanned = listing(directory) if listing else None
+    filenames = None
+    if dry_run:
+        # With a filter, mappings are built from `selected`, and validation is happy with
+        # the scanned names as they are
+        filenames = scanned if selected is not None else _listing(directory, scanned)
+    for position, operation in enumerate(operations):
+        if not dry_run:
+            filenames = scanned if position == 0 else None
+        mapping = build_mapping(directory, operation, filenames if selected is None else selected)
+        validation = validate_mapping(directory, mapping, filenames)
+        step = {
+            "operation": operation, "evaluated": True, "mapping": mapping, "validation": validation,
+            "applied": False, "renamed": 0,
+        }
+        steps.append(step)
+        if not dry_run:
+            if validation["errors"]:
+                break
+            renamer.apply_mapping(mapping)
+            step["applied"] = True
+            step["renamed"] = renamer.last_renamed
+        elif validation["errors"]:
+            # Chaining onto a listing with clashing names would only report bogus issues
+            steps.extend(
+                {"operation": rest, "evaluated": False, "mapping": None, "validation": None, "applied": False, "renamed": 0}
+                for rest in operations[position + 1:]
+            )
+            break
+        elif position + 1 < len(operations):
+            filenames = _renamed_listing(filenames, mapping)
+        if selected is not None and position + 1 < len(operations):
+            selected = _renamed_listing(selected, mapping)
+    return steps
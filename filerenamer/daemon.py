@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+"""
+Persistent CLI daemon.
+
+Keeps a warm process that runs filerenamer.cli invocations sent over a local Unix socket,
+so shell loops and cron jobs skip interpreter startup and imports on every call. The daemon
+also holds one FileRenamer per directory (undo/redo work across invocations) and a cache
+of directory listings that is reused while the directory's mtime is unchanged.
+
+Usage:
+    # Start the daemon (blocks; stop with Ctrl-C or SIGTERM)
+    python -m filerenamer.daemon --socket /tmp/filerenamer.sock
+
+    # Point the CLI at it, invocations fall back to running in-process if it is down
+    export FILERENAMER_SOCKET=/tmp/filerenamer.sock
+    python -m filerenamer.cli --target ./photos --prefix "PRE_"
+
+Protocol:
+    The client sends its working directory followed by each argument, NUL-separated, then
+    shuts down its write side. The daemon replies with "<exit code>\\n<output>".
+"""
+
+import os
+import socket
+import sys
+
+# Maximum number of directory listings kept by the daemon
+SNAPSHOT_CACHE_SIZE = 64
+
+# Seconds the daemon waits on a client to send its request before dropping it
+REQUEST_TIMEOUT = 10
+
+
+def default_socket_path() -> str:
+    """
+    Return FILERENAMER_SOCKET if set, else a per-user socket path in the temp directory.
+    """
+    import tempfile
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.environ.get("FILERENAMER_SOCKET") or os.path.join(tempfile.gettempdir(), f"filerenamer-{uid}.sock")
+
+
+def forward(socket_path: str, argv: list):
+    """
+    Run `argv` on the daemon listening at `socket_path`, echoing its output.
+    Returns the exit code, or None if no daemon is reachable. Once the request is sent it
+    may have renamed files, so a failure after that point is reported (exit code 1) rather
+    than letting the caller run the same arguments again in-process.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    payload = "\0".join([os.getcwd()] + list(argv)).encode("utf-8", "surrogateescape")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with sock:
+        sock.settimeout(REQUEST_TIMEOUT)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+        sock.settimeout(None)  # the request itself may take as long as the renames do
+        chunks = []
+        try:
+            sock.sendall(payload)
+            sock.shutdown(socket.SHUT_WR)
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except OSError as e:
+            print(f"Error: lost connection to the daemon at {socket_path}: {e}", file=sys.stderr)
+            return 1
+    code, _, output = b"".join(chunks).partition(b"\n")
+    if not code.isdigit():
+        print(f"Error: no reply from the daemon at {socket_path}, files may have been renamed", file=sys.stderr)
+        return 1
+    sys.stdout.write(output.decode("utf-8", "surrogateescape"))
+    sys.stdout.flush()
+    return int(code)
+
+
+class SnapshotCache:
+    """
+    Sorted directory listings (as StringTables) keyed by path, reused while the directory's
+    (st_mtime_ns, st_ino) is unchanged. Oldest entries are evicted past `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = SNAPSHOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def listing(self, directory: str):
+        st = os.stat(directory)
+        key = (st.st_mtime_ns, st.st_ino)
+        cached = self._entries.get(directory)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        from filerenamer.mapping import StringTable
+        filenames = StringTable(sorted(os.listdir(directory)))
+        self._entries.pop(directory, None)
+        self._entries[directory] = (key, filenames)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        return filenames
+
+    def invalidate(self, directory: str = None) -> None:
+        """
+        Drop the listing of `directory`, or every listing if it's None.
+        """
+        if directory is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(directory, None)
+
+
+def target_of(argv: list):
+    """
+    The absolute --target directory of a CLI invocation, or None if it has none.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--target", "-t")
+    try:
+        args, _ = parser.parse_known_args(argv)
+    except SystemExit:
+        return None
+    return os.path.abspath(args.target) if args.target else None
+
+
+def handle(request: bytes, renamers: dict, snapshots: SnapshotCache) -> bytes:
+    """
+    Run one CLI request in this process and return the encoded response.
+    """
+    import io
+    from contextlib import redirect_stdout, redirect_stderr
+    from filerenamer.cli import run
+
+    cwd, *argv = request.decode("utf-8", "surrogateescape").split("\0")
+    output = io.StringIO()
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            os.chdir(cwd)
+            code = run(argv, renamers=renamers, listing=snapshots.listing)
+        except Exception as e:
+            print(f"Error: {e}")
+            code = 1
+        # Mtime granularity can hide our own renames, so never trust the target's snapshot
+        # across a write. Other directories' snapshots stay valid.
+        if "--dry-run" not in argv:
+            snapshots.invalidate(target_of(argv))
+    return f"{code}\n{output.getvalue()}".encode("utf-8", "surrogateescape")
+
+
+def serve(socket_path: str) -> None:
+    """
+    Serve CLI requests on `socket_path` one at a time until interrupted.
+    SIGTERM lets the request in progress finish, then stops.
+    """
+    import signal
+    import threading
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform")
+    if os.path.exists(socket_path):
+        # Only clear a stale socket, never take one over from a daemon that is still running
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except OSError:
+                os.remove(socket_path)
+            else:
+                raise OSError(f"A daemon is already listening on {socket_path}")
+
+    renamers = {}
+    snapshots = SnapshotCache()
+
+    old_umask = os.umask(0o077)  # only the current user may connect
+    try:
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+
+    # Never raise from the handler: that would abort a request halfway through its renames.
+    # Closing the listener wakes up a pending accept(), a running request completes first.
+    stopping = threading.Event()
+
+    def terminate(*_):
+        stopping.set()
+        server.close()
+
+    signal.signal(signal.SIGTERM, terminate)
+
+    print(f"FileRenamer daemon listening on {socket_path}")
+    try:
+        with server:
+            server.listen()
+            while not stopping.is_set():
+                try:
+                    conn, _ = server.accept()
+                except OSError:
+                    if stopping.is_set():
+                        break
+                    raise
+                with conn:
+                    # A client that never finishes sending must not block everyone else
+                    conn.settimeout(REQUEST_TIMEOUT)
+                    chunks = []
+                    try:
+                        while True:
+                            chunk = conn.recv(65536)
+                            if not chunk:
+                                break
+                            chunks.append(chunk)
+                    except socket.timeout:
+                        continue
+                    if not chunks:  # e.g. another daemon checking whether this one is alive
+                        continue
+                    response = handle(b"".join(chunks), renamers, snapshots)
+                    try:
+                        conn.sendall(response)
+                    except OSError:
+                        pass  # the client went away, its request was still carried out
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve filerenamer.cli requests from a warm process.")
+    parser.add_argument(
+        "--socket", default=None,
+        help="Unix socket path (default: $FILERENAMER_SOCKET or a per-user temp path)."
+    )
+    args = parser.parse_args()
+    try:
+        serve(args.socket or default_socket_path())
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
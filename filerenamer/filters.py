@@ -0,0 +1,327 @@
+"""
+File selection filters, so operations can target a subset of a directory.
+
+A filter is described by a dict (the same shape is accepted by the CLI, /api/preview and
+batch manifests), every given key must match:
+
+    {
+      "glob": "*.jpg",               # shell pattern(s) on the name, str or list (any matches)
+      "regex": "^IMG_\\d+",          # regular expression searched in the name
+      "ext": ["jpg", "png"],         # extension(s), case-insensitive, with or without the dot
+      "min_size": "1M",              # size bounds in bytes, or with a K/M/G/T suffix
+      "max_size": 5000000,
+      "modified_after": "7d",        # epoch seconds, ISO date/datetime, or an age like 30m/12h/7d/2w
+      "modified_before": "2024-01-01",
+      "type": "file"                 # "file" or "dir"
+    }
+
+Predicates run cheapest first and stop at the first miss: name checks (extension, glob,
+regex), then the entry type, and only then the size and mtime, which need a stat. Name
+checks run as C-level filters over the whole listing. A directory is filtered in a single
+pass: os.scandir when a type check can use the scan's d_type, otherwise os.listdir, with
+one stat per name that passed the name checks when size or mtime are filtered on.
+"""
+
+import math
+import os
+import stat
+import time
+from itertools import compress, tee
+from operator import attrgetter, methodcaller
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from filerenamer.mapping import StringTable
+
+FILTER_KEYS = (
+    "glob", "regex", "ext", "min_size", "max_size", "modified_after", "modified_before", "type"
+)
+
+# Types accepted for each spec key (besides None), checked by FileFilter.from_spec
+_SPEC_TYPES = {
+    "glob": (str, list, tuple),
+    "regex": (str,),
+    "ext": (str, list, tuple),
+    "min_size": (int, float, str),
+    "max_size": (int, float, str),
+    "modified_after": (int, float, str),
+    "modified_before": (int, float, str),
+    "type": (str,),
+}
+
+_SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_size(value: Union[int, float, str]) -> int:
+    """
+    Parse a byte count such as 1048576, "1M", "1.5G" or "512K".
+    Raises ValueError if it can't be parsed or isn't a finite, non-negative size.
+    """
+    if isinstance(value, (int, float)):
+        size = value
+    else:
+        text = str(value).strip().upper()
+        for suffix in ("IB", "B"):  # "1MiB", "1MB" and "1M" all mean the same
+            if text.endswith(suffix):
+                text = text[:-len(suffix)]
+                break
+        unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+        number = text[:len(text) - len(unit)]
+        try:
+            size = float(number) * _SIZE_UNITS[unit]
+        except ValueError:
+            raise ValueError(f"Invalid size: '{value}'") from None
+    # "inf", "nan" and 1e400 parse as floats but aren't sizes
+    if (isinstance(size, float) and not math.isfinite(size)) or size < 0:
+        raise ValueError(f"Invalid size: '{value}' (must be a finite, non-negative number)")
+    return int(size)
+
+
+def parse_time(value: Union[int, float, str], now: float = None) -> float:
+    """
+    Parse a point in time as epoch seconds: a number, an ISO date or datetime,
+    or an age relative to now such as "30m", "12h", "7d" or "2w".
+    Raises ValueError if it can't be parsed or isn't finite.
+    """
+    seconds = _parse_seconds(value, now)
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid time: '{value}' (must be finite)")
+    return seconds
+
+
+def _parse_seconds(value: Union[int, float, str], now: Optional[float]) -> float:
+    try:
+        if isinstance(value, (int, float)):
+            return float(value)
+    except OverflowError:
+        return math.inf
+    text = str(value).strip()
+    unit = text[-1:].lower()
+    if unit in _AGE_UNITS and text[:-1].replace(".", "", 1).isdigit():
+        return (time.time() if now is None else now) - float(text[:-1]) * _AGE_UNITS[unit]
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise ValueError(f"Invalid time: '{value}'") from None
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+class FileFilter:
+    """
+    Compiled filter. Build one from a spec dict with `FileFilter.from_spec`, or use
+    `compile_filter`, which also accepts an existing FileFilter or None.
+    """
+
+    def __init__(
+        self,
+        glob=None,
+        regex: Optional[str] = None,
+        ext=None,
+        min_size=None,
+        max_size=None,
+        modified_after=None,
+        modified_before=None,
+        type: Optional[str] = None,
+    ):
+        import re
+        from fnmatch import translate
+
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        globs = _as_list(glob)
+        self.glob = re.compile("|".join(f"(?:{translate(g)})" for g in globs), flags) if globs else None
+        try:
+            self.regex = re.compile(regex) if regex else None
+        except re.error as e:
+            raise ValueError(f"Invalid regex filter: '{regex}' ({e})") from None
+        exts = tuple("." + e.lower().lstrip(".") for e in _as_list(ext))
+        self.ext = exts or None
+        self.min_size = None if min_size is None else parse_size(min_size)
+        self.max_size = None if max_size is None else parse_size(max_size)
+        self.modified_after = None if modified_after is None else parse_time(modified_after)
+        self.modified_before = None if modified_before is None else parse_time(modified_before)
+        if type not in (None, "file", "dir"):
+            raise ValueError(f"Invalid type filter: '{type}' (use 'file' or 'dir')")
+        self.type = type
+        self.needs_stat = any(
+            bound is not None
+            for bound in (self.min_size, self.max_size, self.modified_after, self.modified_before)
+        )
+
+    @classmethod
+    def from_spec(cls, spec: Dict) -> "FileFilter":
+        if not isinstance(spec, dict):
+            raise ValueError("A filter must be an object such as {\"glob\": \"*.jpg\"}")
+        unknown = set(spec).difference(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filter key(s): {', '.join(sorted(unknown))}")
+        for key, value in spec.items():
+            if value is None:
+                continue
+            # bool is an int subclass, but {"min_size": true} is certainly a mistake
+            if isinstance(value, bool) or not isinstance(value, _SPEC_TYPES[key]):
+                raise ValueError(f"Invalid value for filter '{key}': {value!r}")
+            if isinstance(value, (list, tuple)) and not all(isinstance(item, str) for item in value):
+                raise ValueError(f"Invalid value for filter '{key}': {value!r} (expected strings)")
+        return cls(**spec)
+
+    def match_name(self, name: str) -> bool:
+        """
+        Check the predicates that only need the filename.
+        """
+        if self.ext is not None and not name.lower().endswith(self.ext):
+            return False
+        if self.glob is not None and not self.glob.match(name):
+            return False
+        if self.regex is not None and not self.regex.search(name):
+            return False
+        return True
+
+    def filter_names(self, names: Iterable[str]) -> Iterator[str]:
+        """
+        The names passing match_name, checked by C-level filters over the whole listing
+        rather than one Python call per name.
+        """
+        names = iter(names)
+        if self.ext is not None:
+            names, lowered = tee(names)
+            names = compress(names, map(methodcaller("endswith", self.ext), map(str.lower, lowered)))
+        if self.glob is not None:
+            names = filter(self.glob.match, names)
+        if self.regex is not None:
+            names = filter(self.regex.search, names)
+        return names
+
+    def match_stat(self, st: os.stat_result) -> bool:
+        """
+        Check the size and mtime predicates.
+        """
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        if self.modified_after is not None and st.st_mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and st.st_mtime > self.modified_before:
+            return False
+        return True
+
+    def match_entry(self, entry: os.DirEntry) -> bool:
+        """
+        Check an os.scandir entry, statting only if the cheaper predicates pass.
+        """
+        return self.match_name(entry.name) and self._match_scanned(entry)
+
+    def _match_scanned(self, entry: os.DirEntry) -> bool:
+        """
+        Check the type and stat predicates of an entry whose name already matched.
+        """
+        try:
+            if self.type == "file" and not entry.is_file():
+                return False
+            if self.type == "dir" and not entry.is_dir():
+                return False
+            return not self.needs_stat or self.match_stat(entry.stat())
+        except OSError:
+            return False
+
+    def match_path(self, directory: str, name: str) -> bool:
+        """
+        Check `name` in `directory` when no scandir entry is at hand.
+        """
+        return self.match_name(name) and self._match_stat_path(directory, name)
+
+    def _match_stat_path(self, directory: str, name: str, dir_fd: Optional[int] = None) -> bool:
+        """
+        Check the type and stat predicates of a name that already matched. `dir_fd`, an open
+        descriptor for `directory`, saves joining and resolving the full path.
+        """
+        if self.type is None and not self.needs_stat:
+            return True
+        try:
+            if dir_fd is None:
+                st = os.stat(os.path.join(directory, name))
+            else:
+                st = os.stat(name, dir_fd=dir_fd)
+        except OSError:
+            return False
+        if self.type == "file" and not stat.S_ISREG(st.st_mode):
+            return False
+        if self.type == "dir" and not stat.S_ISDIR(st.st_mode):
+            return False
+        return self.match_stat(st)
+
+
+def compile_filter(file_filter: Union[None, Dict, FileFilter]) -> Optional[FileFilter]:
+    """
+    Return a FileFilter for a spec dict, pass FileFilters through, and map None/{} to None.
+    Raises ValueError for unknown keys or unparseable values.
+    """
+    if file_filter is None or isinstance(file_filter, FileFilter):
+        return file_filter
+    if not file_filter:
+        return None
+    return FileFilter.from_spec(file_filter)
+
+
+def _match_stat_names(f: FileFilter, directory: str, names: Iterable[str]) -> List[str]:
+    """
+    The `names` (already past the name checks) that pass `f`'s type and stat checks.
+    """
+    if f.type is None and not f.needs_stat:
+        return list(names)
+    if os.stat not in os.supports_dir_fd:
+        return [name for name in names if f._match_stat_path(directory, name)]
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        return [name for name in names if f._match_stat_path(directory, name, dir_fd)]
+    finally:
+        os.close(dir_fd)
+
+
+def scan(directory: str, file_filter: Union[None, Dict, FileFilter]) -> Tuple[List[str], StringTable]:
+    """
+    List `directory` once and return (every name, unsorted; the names matching `file_filter`,
+    as a sorted StringTable), so a caller can validate against the listing it selected from.
+    Only the names that pass the name checks get their type or stat looked at.
+    """
+    f = compile_filter(file_filter)
+    if f is None or f.type is None or f.needs_stat:
+        # os.listdir is cheaper than building DirEntry objects, whose d_type is only worth
+        # having for a type check that would otherwise need a stat
+        names = os.listdir(directory)
+        picked = names if f is None else _match_stat_names(f, directory, f.filter_names(names))
+        return names, StringTable(sorted(picked))
+    with os.scandir(directory) as it:
+        entries = list(it)
+    names = list(map(attrgetter("name"), entries))
+    by_name = dict(zip(names, entries))
+    candidates = map(by_name.__getitem__, f.filter_names(names))
+    picked = [entry.name for entry in candidates if f._match_scanned(entry)]
+    return names, StringTable(sorted(picked))
+
+
+def select(
+    directory: str,
+    file_filter: Union[Dict, FileFilter],
+    filenames: Optional[Iterable[str]] = None
+) -> StringTable:
+    """
+    Return the names in `directory` (or among `filenames`) that match `file_filter`,
+    as a sorted StringTable. Without `filenames`, this is a single directory pass (see scan).
+    """
+    if filenames is None:
+        return scan(directory, file_filter)[1]
+    f = compile_filter(file_filter)
+    if f is None:
+        return StringTable(sorted(filenames))
+    return StringTable(sorted(_match_stat_names(f, directory, f.filter_names(filenames))))
@@ -0,0 +1,302 @@
+"""
+Memory-lean containers for directory listings and rename mappings.
+
+A plain { old_name: new_name } dict costs two str objects plus a hash entry per file,
+which adds up to several GB at millions of files. The types here keep the same read-only,
+dict-like interface while storing:
+
+- names in a StringTable: every name packed into one str, with an offsets array
+- old names as indices into a (shared) StringTable
+- new names as a rule applied to the old name on demand (e.g. "add this prefix"), or,
+  for arbitrary mappings, as a delta: kept head/tail lengths plus the changed middle
+
+This trades CPU for memory: names are sliced out (and hashed) again on every pass and new
+names are computed by a Python-level rule, so iterating, validating or serializing a
+compact mapping is slower than doing the same with a dict that already holds every str.
+"""
+
+import sys
+from array import array
+from collections import deque
+from bisect import bisect_left
+from collections.abc import ItemsView, Mapping, Sequence, ValuesView
+from itertools import accumulate, compress, count, islice, repeat, tee
+from operator import ne
+from json import dumps
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+
+class StringTable(Sequence):
+    """
+    Immutable sequence of strings stored as one packed str plus an array of offsets.
+    Items are sliced out on access, so only the strings in use exist as objects.
+    """
+    __slots__ = ("_data", "_offsets")
+
+    def __init__(self, strings: Iterable[str] = ()):
+        if not isinstance(strings, (list, tuple)):
+            strings = list(strings)
+        self._data = "".join(strings)
+        self._offsets = array("Q", [0])
+        self._offsets.extend(accumulate(map(len, strings)))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringTable index out of range")
+        return self._data[self._offsets[index]:self._offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        offsets = self._offsets
+        return map(self._data.__getitem__, map(slice, offsets, islice(offsets, 1, None)))
+
+    def __repr__(self) -> str:
+        return f"StringTable({len(self)} strings)"
+
+    def __reduce__(self):
+        return (_rebuild_table, (self._data, self._offsets))
+
+    def nbytes(self) -> int:
+        """
+        Memory held by the packed str and the offsets array.
+        """
+        return sys.getsizeof(self._data) + sys.getsizeof(self._offsets)
+
+
+def _rebuild_table(data: str, offsets: array) -> StringTable:
+    table = StringTable.__new__(StringTable)
+    table._data = data
+    table._offsets = offsets
+    return table
+
+
+class DeltaRule:
+    """
+    Rule for arbitrary mappings: entry k keeps the first heads[k] and last tails[k]
+    characters of the old name and replaces what's between them with middles[k].
+    """
+    __slots__ = ("heads", "tails", "middles")
+
+    def __init__(self, heads: array, tails: array, middles: StringTable):
+        self.heads = heads
+        self.tails = tails
+        self.middles = middles
+
+    def __call__(self, position: int, old: str) -> str:
+        offsets = self.middles._offsets
+        middle = self.middles._data[offsets[position]:offsets[position + 1]]
+        return old[:self.heads[position]] + middle + old[len(old) - self.tails[position]:]
+
+
+def _delta(old: str, new: str) -> Tuple[int, int, str]:
+    """
+    Split `new` into (kept head length, kept tail length, middle) relative to `old`.
+    Common head and tail lengths are found by bisecting on slice comparisons.
+    """
+    # Fast paths for the common "added a prefix" / "added a suffix" cases
+    if new.endswith(old):
+        return 0, len(old), new[:len(new) - len(old)]
+    if new.startswith(old):
+        return len(old), 0, new[len(old):]
+    limit = min(len(old), len(new))
+    low, high = 0, limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if new.startswith(old[:mid]):
+            low = mid
+        else:
+            high = mid - 1
+    head = low
+    low, high = 0, limit - head
+    while low < high:
+        mid = (low + high + 1) // 2
+        if new.endswith(old[len(old) - mid:]):
+            low = mid
+        else:
+            high = mid - 1
+    tail = low
+    return head, tail, new[head:len(new) - tail]
+
+
+class CompactMapping(Mapping):
+    """
+    Read-only { old_name: new_name } mapping backed by a StringTable.
+
+    `names` is a sorted StringTable (usually the directory listing, shared with other
+    mappings built from it), `keys_index` the ascending table indices of the renamed entries
+    and `rule(position, old_name)` computes the new name of the entry at `position` in
+    `keys_index`. `order`, if given, lists the positions in iteration order (for mappings
+    whose entries must be applied in an order other than by name).
+    Iteration is lazy and in `names` order unless `order` says otherwise, lookups are
+    binary searches.
+    """
+    __slots__ = ("names", "keys_index", "rule", "order")
+
+    def __init__(
+        self,
+        names: StringTable,
+        keys_index: Sequence,
+        rule: Callable[[int, str], str],
+        order: Sequence = None
+    ):
+        self.names = names
+        self.keys_index = keys_index
+        self.rule = rule
+        self.order = order
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, str]]) -> "CompactMapping":
+        """
+        Build a mapping from arbitrary (old, new) pairs, storing new names as deltas.
+        Entries are stored by old name but iterate in the order given, which matters when
+        one entry's target is another's source.
+        """
+        pairs = pairs if isinstance(pairs, list) else list(pairs)
+        ranked = sorted(range(len(pairs)), key=pairs.__getitem__)
+        olds: List[str] = []
+        heads = array("I")
+        tails = array("I")
+        middles: List[str] = []
+        for old, new in map(pairs.__getitem__, ranked):
+            head, tail, middle = _delta(old, new)
+            olds.append(old)
+            heads.append(head)
+            tails.append(tail)
+            middles.append(middle)
+        order = None
+        if any(map(ne, ranked, count())):
+            # order[k] is the sorted position of the k-th pair given
+            order = array("Q", bytes(8 * len(ranked)))
+            deque(map(order.__setitem__, ranked, count()), maxlen=0)
+        return cls(StringTable(olds), range(len(olds)), DeltaRule(heads, tails, StringTable(middles)), order)
+
+    def _position(self, old: str) -> int:
+        """
+        Position of `old` in `keys_index`, or -1 if it isn't mapped.
+        """
+        if not isinstance(old, str):
+            return -1
+        index = bisect_left(self.names, old)
+        if index == len(self.names) or self.names[index] != old:
+            return -1
+        position = bisect_left(self.keys_index, index)
+        if position == len(self.keys_index) or self.keys_index[position] != index:
+            return -1
+        return position
+
+    def __getitem__(self, old: str) -> str:
+        position = self._position(old)
+        if position < 0:
+            raise KeyError(old)
+        return self.rule(position, old)
+
+    def __contains__(self, old) -> bool:
+        return self._position(old) >= 0
+
+    def __len__(self) -> int:
+        return len(self.keys_index)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._iter_olds()
+
+    # Iteration is built from map/zip chains so the per-entry loop stays in C
+
+    def _positions(self) -> Iterable[int]:
+        return count() if self.order is None else self.order
+
+    def _iter_indices(self) -> Iterable[int]:
+        """
+        Table indices of the mapped names, in iteration order.
+        """
+        if self.order is None:
+            return self.keys_index
+        return map(self.keys_index.__getitem__, self.order)
+
+    def _iter_olds(self) -> Iterator[str]:
+        keys_index = self.keys_index
+        if self.order is None and isinstance(keys_index, range) and keys_index == range(len(self.names)):
+            return iter(self.names)
+        offsets = self.names._offsets
+        starts, ends = tee(self._iter_indices())
+        starts = map(offsets.__getitem__, starts)
+        ends = map(offsets.__getitem__, map((1).__add__, ends))
+        return map(self.names._data.__getitem__, map(slice, starts, ends))
+
+    def _iter_news(self) -> Iterator[str]:
+        return map(self.rule, self._positions(), self._iter_olds())
+
+    def _iter_items(self) -> Iterator[Tuple[str, str]]:
+        # Slice each old name out of the table once and feed it to both sides
+        olds, rule_input = tee(self._iter_olds())
+        return zip(olds, map(self.rule, self._positions(), rule_input))
+
+    def items(self) -> "_CompactItems":
+        return _CompactItems(self)
+
+    def values(self) -> "_CompactValues":
+        return _CompactValues(self)
+
+    def unmapped(self) -> Iterator[str]:
+        """
+        Names in `names` that this mapping leaves alone.
+        """
+        if len(self.keys_index) == len(self.names):  # ascending and unique, so that's all of them
+            return iter(())
+        keep = bytearray(b"\x01") * len(self.names)
+        deque(map(keep.__setitem__, self.keys_index, repeat(0)), maxlen=0)
+        return compress(self.names, keep)
+
+    def renamed(self) -> List[str]:
+        """
+        The whole `names` listing as it would read after applying this mapping (unsorted).
+        """
+        listing = list(self.names)
+        for (old, new), index in zip(self._iter_items(), self._iter_indices()):
+            listing[index] = new
+        return listing
+
+    def __repr__(self) -> str:
+        return f"CompactMapping({len(self)} of {len(self.names)} names)"
+
+
+class _CompactItems(ItemsView):
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+
+class _CompactValues(ValuesView):
+    def __iter__(self):
+        return self._mapping._iter_news()
+
+
+def compact(mapping: Mapping) -> CompactMapping:
+    """
+    Return `mapping` as a CompactMapping, converting plain dicts.
+    """
+    if isinstance(mapping, CompactMapping):
+        return mapping
+    return CompactMapping.from_pairs(mapping.items())
+
+
+def iter_json(mapping: Mapping, chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Serialize `mapping` as a JSON object in chunks of `chunk_size` entries,
+    without building the whole document (or a dict) in memory.
+    """
+    items = iter(mapping.items())
+    yield "{"
+    separator = ""
+    while True:
+        # Only one chunk-sized dict exists at a time, encoded by the C JSON encoder
+        chunk = dict(islice(items, chunk_size))
+        if not chunk:
+            break
+        yield separator + dumps(chunk)[1:-1]
+        separator = ", "
+    yield "}"
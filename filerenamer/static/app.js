@@ -1,6 +1,9 @@
 (function(){
   // -- Directory navigation state --
   let currentPath = '';
+  let nextDirOffset = null;  // offset of the next page of subdirectories, null when all loaded
+  const LOAD_MORE = "__load_more__";
+  const DIR_POLL_MS = 300;   // how often to ask again while a folder is still being listed
 
   const actionSelect = document.getElementById("action-select");
   const replaceInputs = document.getElementById("replace-inputs");
@@ -30,24 +33,60 @@
     localStorage.setItem("filerenamer-theme", themeToggle.checked ? "dark" : "light");
   });
 
-  async function listDirAsync(path) {
-    let url = "/api/list_dir";
-    if (path) url += `?path=${encodeURIComponent(path)}`;
-    return fetch(url)
-      .then(res => res.json())
+  // Fetch one page of subdirectories. An uncached folder may come back "pending" while the
+  // server lists it in the background: call onPending once, then poll until it's ready.
+  async function listDirAsync(path, offset = 0, onPending = null) {
+    const params = new URLSearchParams();
+    if (path) params.set("path", path);
+    if (offset) params.set("offset", offset);
+    let data = await fetch(`/api/list_dir?${params}`).then(res => res.json());
+    if (data.pending && onPending) onPending(data);
+    while (data.pending) {
+      await new Promise(resolve => setTimeout(resolve, DIR_POLL_MS));
+      data = await fetch(`/api/list_dir?${params}`).then(res => res.json());
+    }
+    return data;
   }
 
-  async function refreshDir(path) {
-    const data = await listDirAsync(path);
-    currentPath = data.current;
+  // Append one page of subdirectories, plus a "load more" entry if there are more pages
+  function appendDirPage(data) {
+    const more = currentDirSelect.querySelector(`option[value="${LOAD_MORE}"]`);
+    if (more) more.remove();
+    data.dirs.forEach(d => currentDirSelect.append(new Option(d, d)));
+    nextDirOffset = data.next_offset;
+    if (nextDirOffset !== null) {
+      const remaining = data.total - nextDirOffset;
+      currentDirSelect.append(new Option(`… load ${remaining} more`, LOAD_MORE));
+    }
+  }
+
+  // Reset the dropdown to the current directory and "..", ready for pages to be appended
+  function resetDirSelect(current) {
+    currentPath = current;
     currentDirSelect.innerHTML = "";
     // Show current directory as first option
-    currentDirSelect.append(new Option(data.current, data.current));
+    currentDirSelect.append(new Option(current, current));
     // Option to go up
     currentDirSelect.append(new Option("..", ".."));
-    data.dirs.forEach(d => currentDirSelect.append(new Option(d, d)));
     // Set the selected value to current directory
-    currentDirSelect.value = data.current;
+    currentDirSelect.value = current;
+  }
+
+  async function refreshDir(path) {
+    const data = await listDirAsync(path, 0, pending => {
+      resetDirSelect(pending.current);
+      const loading = new Option("loading…", "");
+      loading.disabled = true;
+      currentDirSelect.append(loading);
+    });
+    resetDirSelect(data.current);
+    appendDirPage(data);
+  }
+
+  async function loadMoreDirs() {
+    const data = await listDirAsync(currentPath, nextDirOffset);
+    appendDirPage(data);
+    currentDirSelect.value = currentPath;
   }
 
   // Show/hide the correct input fields based on selected action
@@ -96,6 +135,11 @@
       payload.loc   = document.getElementById("enum-loc").value;
     }
 
+    const glob = document.getElementById("filter-glob").value.trim();
+    if (glob) {
+      payload.filter = { glob: glob };
+    }
+
     fetch("/api/preview", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
@@ -117,8 +161,17 @@
         tableBody.appendChild(row);
       }
 
-      // Enable the “Rename Files” button only if there’s at least one mapping
-      applyBtn.disabled = Object.keys(mapping).length === 0;
+      // Summarize validation problems, errors block the rename
+      const validation = data.validation || { errors: [], warnings: [] };
+      const problems = validation.errors.concat(validation.warnings);
+      statusDiv.textContent = problems.length
+        ? `⚠️ ${validation.errors.length} error(s), ${validation.warnings.length} warning(s): `
+          + problems.slice(0, 3).map(p => p.message).join("; ")
+          + (problems.length > 3 ? "; …" : "")
+        : "";
+
+      // Enable the “Rename Files” button only if there’s at least one mapping and no errors
+      applyBtn.disabled = Object.keys(mapping).length === 0 || validation.errors.length > 0;
       // Store the mapping in a global so we can re-use it on “apply”
       window.currentMapping = mapping;
     });
@@ -190,6 +243,9 @@
     if (sel === currentPath) {
       // No change
       return;
+    } else if (sel === LOAD_MORE) {
+      loadMoreDirs();
+      return;
     } else if (sel === "..") {
       // Let backend handle going up
       next = sel;
@@ -276,7 +332,7 @@
   });
 
   // Add keypress listeners to inputs to trigger preview on Enter
-  const inputIds = ["replace-from", "replace-to", "prefix-value", "suffix-value", "enum-start", "enum-sep", "enum-loc"];
+  const inputIds = ["replace-from", "replace-to", "prefix-value", "suffix-value", "enum-start", "enum-sep", "enum-loc", "filter-glob"];
   inputIds.forEach(id => {
     const input = document.getElementById(id);
     if (input) {
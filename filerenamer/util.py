@@ -1,7 +1,13 @@
 import os
+import queue
 import sys
 import subprocess
 import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+from typing import Optional
 
 def prompt_for_directory(title: str = "Select folder to rename files in") -> str:
     """
@@ -59,15 +65,159 @@ def prompt_for_directory(title: str = "Select folder to rename files in") -> str
     root.destroy()
     return folder or ""
 
-def list_directories(path: str) -> list:
+class DirectoryCache:
     """
-    Return a sorted list of subdirectories in the given path.
-    If the path is invalid or not a directory, returns an empty list.
+    Thread-safe cache of sorted subdirectory listings for the folder browser.
+
+    Listings come from a single os.scandir pass, using the d_type the OS already returned
+    instead of a stat per entry (symlinks and filesystems without d_type still stat).
+    Entries expire after `ttl` seconds or as soon as the directory's mtime changes, and
+    the least recently used ones are evicted past `max_entries`. After listing a directory
+    on a cache miss, its parent and first `prefetch` subdirectories are listed by
+    background threads, so the next click is usually already cached.
+    A miss is listed on a background thread too, and callers may bound how long they wait
+    for it (see `get`), so a huge or slow directory doesn't hold a request open.
     """
+
+    # Most subdirectory names returned by one page
+    MAX_PAGE_SIZE = 5000
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 256, prefetch: int = 8, workers: int = 2):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefetch = prefetch
+        self.workers = workers
+        self._entries = OrderedDict()  # path -> (listed_at, mtime_ns, dirs)
+        self._lock = threading.Lock()
+        self._pending = set()          # paths queued or being prefetched
+        self._queue = None             # created with the worker threads on first prefetch
+        self._loading = {}             # path -> Future of a cache miss being listed
+
+    def get(self, path: str, wait: Optional[float] = None) -> Optional[tuple]:
+        """
+        Return the sorted subdirectory names of `path` as a tuple, or () if it can't be read.
+        A cache miss is listed on a background thread; if that takes longer than `wait`
+        seconds, return None instead and let the listing finish into the cache, so asking
+        again later picks it up. `wait=None` waits for as long as the listing takes.
+        """
+        path = os.path.abspath(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return ()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[1] == mtime_ns and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(path)
+                return entry[2]
+            # A miss already being listed (by an earlier request that gave up waiting) is joined
+            loading = self._loading.get(path)
+            if loading is None:
+                loading = self._loading[path] = Future()
+                threading.Thread(
+                    target=self._load_miss, args=(path, mtime_ns, loading), name="dir-list", daemon=True
+                ).start()
+        try:
+            return loading.result(timeout=wait)
+        except TimeoutError:
+            return None
+
+    def page(self, path: str, offset: int = 0, limit: int = None, wait: Optional[float] = None) -> dict:
+        """
+        Return one page of at most `limit` (1 to MAX_PAGE_SIZE, default MAX_PAGE_SIZE) of
+        `path`'s subdirectories as
+        { "dirs": [...], "total": n, "offset": offset, "next_offset": int or None, "pending": False }.
+        If the listing isn't ready within `wait` seconds (see `get`), "dirs" is empty,
+        "total" and "next_offset" are None and "pending" is True: ask again shortly.
+        """
+        offset = max(0, offset)
+        limit = self.MAX_PAGE_SIZE if limit is None else min(max(1, limit), self.MAX_PAGE_SIZE)
+        dirs = self.get(path, wait)
+        if dirs is None:
+            return {"dirs": [], "total": None, "offset": offset, "next_offset": None, "pending": True}
+        end = offset + limit
+        return {
+            "dirs": list(dirs[offset:end]),
+            "total": len(dirs),
+            "offset": offset,
+            "next_offset": end if end < len(dirs) else None,
+            "pending": False,
+        }
+
+    def invalidate(self, path: str = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def _load_miss(self, path: str, mtime_ns: int, loading: Future) -> None:
+        """
+        List a cache miss for `get`, then queue its neighbours for prefetching.
+        """
+        try:
+            dirs = self._load(path, mtime_ns)
+        except BaseException as e:
+            loading.set_exception(e)  # don't leave waiters hanging
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(path, None)
+        loading.set_result(dirs)
+        if self.prefetch:
+            parent = os.path.dirname(path)
+            self._schedule([parent] + [os.path.join(path, d) for d in dirs[:self.prefetch]])
+
+    def _load(self, path: str, mtime_ns: int) -> tuple:
+        try:
+            with os.scandir(path) as it:
+                dirs = tuple(sorted(entry.name for entry in it if _is_dir(entry)))
+        except OSError:
+            return ()
+        with self._lock:
+            self._entries[path] = (time.monotonic(), mtime_ns, dirs)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dirs
+
+    def _schedule(self, paths: list) -> None:
+        """
+        Queue `paths` for background listing, skipping ones already cached or queued.
+        Requests are dropped rather than blocking when the queue is full.
+        """
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue(maxsize=self.prefetch * 4)
+                for i in range(self.workers):
+                    threading.Thread(target=self._prefetch_worker, name=f"dir-prefetch-{i}", daemon=True).start()
+            for path in paths:
+                if path in self._entries or path in self._pending:
+                    continue
+                try:
+                    self._queue.put_nowait(path)
+                except queue.Full:
+                    break
+                self._pending.add(path)
+
+    def _prefetch_worker(self) -> None:
+        while True:
+            path = self._queue.get()
+            try:
+                self._load(path, os.stat(path).st_mtime_ns)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+
+
+def _is_dir(entry) -> bool:
     try:
-        return sorted([
-            d for d in os.listdir(path)
-            if os.path.isdir(os.path.join(path, d))
-        ])
-    except Exception:
-        return []
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+# Shared by the web app's folder browser
+directory_cache = DirectoryCache()
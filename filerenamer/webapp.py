@@ -15,12 +15,14 @@ Routes:
 """
 
 import os
-import webbrowser
-from flask import Flask, jsonify, request
+import json
+import threading
+from flask import Flask, Response, jsonify, request
 from flask import send_from_directory
 from functools import wraps
-from filerenamer.core import FileRenamerSingleton
-from filerenamer.util import prompt_for_directory, list_directories
+from filerenamer.core import FileRenamerSingleton, run_operations
+from filerenamer.mapping import iter_json
+from filerenamer.util import prompt_for_directory, directory_cache
 
 
 def with_filerenamer(func):
@@ -34,6 +36,17 @@ def with_filerenamer(func):
 
 app = Flask(__name__)
 
+# Serializes the requests that rename files and change the undo/redo history (/api/apply,
+# /api/undo, /api/redo). The server is threaded, and without this an undo could pop and
+# reverse a mapping that another request is still applying.
+rename_lock = threading.Lock()
+
+# Default number of subdirectories returned per /api/list_dir request
+DIR_PAGE_SIZE = 500
+
+# Seconds /api/list_dir waits for an uncached folder before answering "pending"
+DIR_LIST_WAIT = 0.25
+
 @app.route("/", methods=["GET"])
 @app.route("/index.html", methods=["GET"])
 def serve_index():
@@ -55,36 +68,31 @@ def list_files():
 def preview_mapping():
     """
     Given JSON payload like {"action":"replace","change_this":"foo","to_this":"bar"},
-    call the corresponding core.* function to get a mapping, then return it.
+    build and validate the mapping as a one-step dry run, then stream both back.
+    An optional "filter" (see filerenamer.filters), e.g. {"ext": "jpg", "min_size": "1M"},
+    restricts the operation to matching files.
     """
     fr = FileRenamerSingleton.get()
 
     data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
 
-    action = data.get("action")
-    if action == "replace":
-        change_this = data["change_this"]
-        to_this     = data["to_this"]
-        mapping = fr.replace_mapping(change_this, to_this)
-
-    elif action == "prefix":
-        prefix = data["prefix"]
-        mapping = fr.prefix_mapping(prefix)
-
-    elif action == "suffix":
-        suffix = data["suffix"]
-        mapping = fr.suffix_mapping(suffix)
+    # A one-step dry run lists the directory once, for both the mapping and its validation
+    try:
+        step = run_operations(fr, [data], dry_run=True, file_filter=data.get("filter"))[0]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    elif action == "enum":
-        start = int(data.get("start", 1))
-        sep   = data.get("sep", "_")
-        direction = data.get("loc", "end")
-        mapping = fr.enum_mapping(start, direction, sep)
+    mapping, validation = step["mapping"], step["validation"]
 
-    else:
-        return jsonify({"error": "Unknown action"}), 400
+    # Stream the mapping out in chunks rather than building a dict and one big JSON string
+    def generate():
+        yield '{"mapping": '
+        yield from iter_json(mapping)
+        yield f', "validation": {json.dumps(validation)}}}'
 
-    return jsonify({"mapping": mapping})
+    return Response(generate(), mimetype="application/json")
 
 
 @with_filerenamer
@@ -92,6 +100,7 @@ def preview_mapping():
 def apply_mapping():
     """
     Given JSON payload {"mapping": { old_name: new_name, ... }},
+    validate it against the target dir and, if there are no errors,
     actually rename on disk. Return success or error.
     """
     fr = FileRenamerSingleton.get()
@@ -99,8 +108,13 @@ def apply_mapping():
     data = request.json or {}
     mapping = data.get("mapping", {})
 
-    # TODO add more validation here (e.g., confirm no collisions)
-    fr.apply_mapping(mapping)
+    # Validate and apply under the lock, so nothing renames files in between
+    with rename_lock:
+        validation = fr.validate_mapping(mapping)
+        if validation["errors"]:
+            count = len(validation["errors"])
+            return jsonify({"error": f"Mapping has {count} problem(s)", "validation": validation}), 400
+        fr.apply_mapping(mapping)
     files = fr.filenames
     return jsonify({"status": "ok", "files": files}), 200
 
@@ -156,13 +170,18 @@ def change_directory_path():
 @app.route("/api/list_dir", methods=["GET"])
 def list_dir():
     """
-    JSON endpoint to list subdirectories of a given path.
-    Query param: ?path=<directory>
+    JSON endpoint to list one page of subdirectories of a given path.
+    Query params: ?path=<directory>&offset=<int>&limit=<int>
+    Listings are cached and neighbouring folders prefetched, see util.DirectoryCache.
+    An uncached folder that takes longer than DIR_LIST_WAIT to list gets {"pending": true}
+    and no dirs; the listing carries on in the background and the client asks again.
     """
     # Use provided path or default to current directory
     target = request.args.get("path") or FileRenamerSingleton.get().directory
-    dirs = list_directories(target)
-    return jsonify({"current": target, "dirs": dirs})
+    offset = request.args.get("offset", 0, type=int)
+    limit = request.args.get("limit", DIR_PAGE_SIZE, type=int)
+    page = directory_cache.page(target, offset, limit, wait=DIR_LIST_WAIT)
+    return jsonify({"current": target, **page})
 
 @with_filerenamer
 @app.route("/api/undo", methods=["POST"])
@@ -173,7 +192,8 @@ def undo_operation():
     fr = FileRenamerSingleton.get()
 
     try:
-        fr.undo()
+        with rename_lock:
+            fr.undo()
         files = fr.filenames
         return jsonify({"status": "ok", "files": files}), 200
     except IndexError as e:
@@ -192,7 +212,8 @@ def redo_operation():
     fr = FileRenamerSingleton.get()
 
     try:
-        fr.redo()
+        with rename_lock:
+            fr.redo()
         files = fr.filenames
         return jsonify({"status": "ok", "files": files}), 200
     except IndexError as e:
@@ -212,6 +233,7 @@ def main():
     FileRenamerSingleton.initialize(folder)
 
     # 2) Open default browser to the frontend page
+    import webbrowser
     webbrowser.open("http://127.0.0.1:8000/index.html")
 
     # 3) Run Flask on the main thread (threaded=True for concurrent requests, disable reloader)